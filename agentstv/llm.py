@@ -2,86 +2,292 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import importlib.util
 import json
 import logging
 import os
 import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
 
 import httpx
 
+try:
+    import orjson
+except ImportError:  # optional speedup — stdlib json works fine
+    orjson = None
+
 log = logging.getLogger(__name__)
 
+
+def _dumps(obj) -> bytes:
+    """Serialize *obj* to JSON bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers can keep
+# catching the stdlib exception either way.
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+@functools.lru_cache(maxsize=32)
+def _static_prefix(static: tuple[tuple[str, object], ...]) -> bytes:
+    """Serialized static payload fields, without the closing brace."""
+    return _dumps(dict(static))[:-1]
+
+
+def _encode_payload(static: tuple[tuple[str, object], ...], **dynamic) -> bytes:
+    """Build a JSON request body from cached static fields plus per-call ones.
+
+    The static part (model, token limits, flags) is serialized once per
+    distinct combination; only the prompt-bearing fields are encoded per call.
+    """
+    parts = [_static_prefix(static)]
+    for key, value in dynamic.items():
+        parts.append(b',"' + key.encode() + b'":' + _dumps(value))
+    parts.append(b"}")
+    return b"".join(parts)
+
 # Persistent HTTP clients — lazily initialized, reused across calls
 _ollama_client: httpx.AsyncClient | None = None
 _openai_client: httpx.AsyncClient | None = None
 _anthropic_client: httpx.AsyncClient | None = None
 
+# Keep-alive pool shared by every provider client
+_POOL_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=60)
+
+# HTTP/2 multiplexing for the cloud APIs needs the optional ``h2`` package
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+OPENAI_BASE_URL = "https://api.openai.com"
+ANTHROPIC_BASE_URL = "https://api.anthropic.com"
+
 
 def _get_ollama_client() -> httpx.AsyncClient:
     global _ollama_client
     if _ollama_client is None or _ollama_client.is_closed:
-        _ollama_client = httpx.AsyncClient(timeout=60.0)
+        # Local plain-HTTP server — HTTP/2 would not be negotiated anyway
+        _ollama_client = httpx.AsyncClient(timeout=60.0, limits=_POOL_LIMITS)
     return _ollama_client
 
 
 def _get_openai_client() -> httpx.AsyncClient:
     global _openai_client
     if _openai_client is None or _openai_client.is_closed:
-        _openai_client = httpx.AsyncClient(timeout=30.0)
+        _openai_client = httpx.AsyncClient(
+            timeout=30.0, limits=_POOL_LIMITS, http2=_HTTP2_AVAILABLE,
+        )
     return _openai_client
 
 
 def _get_anthropic_client() -> httpx.AsyncClient:
     global _anthropic_client
     if _anthropic_client is None or _anthropic_client.is_closed:
-        _anthropic_client = httpx.AsyncClient(timeout=30.0)
+        _anthropic_client = httpx.AsyncClient(
+            timeout=30.0, limits=_POOL_LIMITS, http2=_HTTP2_AVAILABLE,
+        )
     return _anthropic_client
 
 
+async def warmup() -> None:
+    """Open a pooled connection to the configured provider ahead of time.
+
+    Pays the TCP/TLS handshake at startup instead of on the first chat
+    message.  Failures are ignored — the real call will surface them.
+    """
+    if not is_ready():
+        return
+    if LLM_PROVIDER == "anthropic":
+        client, url = _get_anthropic_client(), ANTHROPIC_BASE_URL
+    elif LLM_PROVIDER == "openai":
+        client, url = _get_openai_client(), OPENAI_BASE_URL
+    else:
+        client, url = _get_ollama_client(), OLLAMA_URL
+    try:
+        await client.head(url)
+    except httpx.HTTPError as exc:
+        log.debug("LLM warmup against %s failed: %s", url, exc)
+
+
 async def shutdown_clients() -> None:
-    """Close all persistent HTTP clients. Called during server shutdown."""
-    global _ollama_client, _openai_client, _anthropic_client
+    """Close HTTP clients and the disk cache, and stop the batch worker.
+
+    Called during server shutdown.
+    """
+    global _ollama_client, _openai_client, _anthropic_client, _batch_queue, _batch_task
     for client in (_ollama_client, _openai_client, _anthropic_client):
         if client and not client.is_closed:
             await client.aclose()
     _ollama_client = None
     _openai_client = None
     _anthropic_client = None
+    if _batch_task is not None and not _batch_task.done():
+        _batch_task.cancel()
+    for run in list(_batch_runs):
+        run.cancel()
+    _batch_queue = None
+    _batch_task = None
+    _close_disk_cache()
+
+# Response cache — memoizes parsed replies for identical prompts.
+# Keyed on a digest of (provider, model, system, user, count, raw); values are
+# (monotonic_timestamp, result) so stale entries expire after CACHE_TTL.
+_response_cache: OrderedDict[str, tuple[float, list[str] | str]] = OrderedDict()
+_RESPONSE_CACHE_MAX = 512
+CACHE_TTL: float = float(os.environ.get("AGENTSTV_LLM_CACHE_TTL", "60"))
+
+# In-flight provider calls by cache key — concurrent identical prompts await
+# the same task instead of each firing its own request.
+_inflight: dict[str, asyncio.Task] = {}
+
+# Optional on-disk layer under the in-memory cache (SQLite, opt-in with
+# AGENTSTV_CACHE=1) so replays and dev restarts reuse earlier replies.
+DISK_CACHE: bool = os.environ.get("AGENTSTV_CACHE", "").lower() in ("1", "true", "yes")
+CACHE_DIR: Path = Path(os.environ.get("AGENTSTV_CACHE_DIR", "~/.cache/agentstv")).expanduser()
+_DISK_CACHE_EXPIRE = 86400  # seconds
+_disk_db: sqlite3.Connection | None = None
+_disk_lock = threading.Lock()
+
+# Max concurrent requests per provider (override with AGENTSTV_<PROVIDER>_CONCURRENCY).
+# Excess calls wait here instead of piling onto a rate-limited API.
+_DEFAULT_CONCURRENCY = {"openai": 8, "anthropic": 8, "ollama": 4}
+# Semaphores bind to the event loop they are first contended on, so the set
+# is rebuilt when calls start arriving on a different loop.
+_semaphores: dict[str, asyncio.Semaphore] = {}
+_semaphores_loop: asyncio.AbstractEventLoop | None = None
+
+# Circuit breaker — after _CIRCUIT_THRESHOLD consecutive failed calls the
+# provider is reported as not ready for _CIRCUIT_COOLDOWN seconds.
+_CIRCUIT_THRESHOLD = 5
+_CIRCUIT_COOLDOWN = 30
+_consecutive_failures: dict[str, int] = {}
+_circuit_open_until: dict[str, float] = {}
+
+# Viewer-chat batching — jobs queued within _BATCH_WINDOW seconds of each
+# other are folded into a single prompt (up to _MAX_BATCH jobs per call).
+_MAX_BATCH = 6
+_BATCH_WINDOW = 0.2
+_batch_queue: asyncio.Queue | None = None
+_batch_task: asyncio.Task | None = None
+# Batches being generated; asyncio only holds weak references to tasks
+_batch_runs: set[asyncio.Task] = set()
+_BATCH_TAG = re.compile(r"^\s*\[(\d+)\]\s*")
+
+
+def clear_cache() -> None:
+    """Drop all memoized LLM responses held in memory."""
+    _response_cache.clear()
+
+
+def _disk_conn() -> sqlite3.Connection:
+    """Open (once) the on-disk response cache. Caller holds _disk_lock."""
+    global _disk_db
+    if _disk_db is None:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _disk_db = sqlite3.connect(CACHE_DIR / "llm-cache.sqlite3", check_same_thread=False)
+        _disk_db.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+        _disk_db.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+        _disk_db.commit()
+    return _disk_db
+
+
+def _disk_get(key: str) -> list[str] | str | None:
+    try:
+        with _disk_lock:
+            row = _disk_conn().execute(
+                "SELECT value FROM responses WHERE key = ? AND expires >= ?", (key, time.time())
+            ).fetchone()
+    except sqlite3.Error as exc:
+        log.debug("Disk cache read failed: %s", exc)
+        return None
+    return _loads(row[0]) if row else None
+
+
+def _disk_set(key: str, value: list[str] | str) -> None:
+    try:
+        with _disk_lock:
+            db = _disk_conn()
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires) VALUES (?, ?, ?)",
+                (key, _dumps(value), time.time() + _DISK_CACHE_EXPIRE),
+            )
+            db.commit()
+    except sqlite3.Error as exc:
+        log.debug("Disk cache write failed: %s", exc)
+
+
+def _close_disk_cache() -> None:
+    global _disk_db
+    with _disk_lock:
+        if _disk_db is not None:
+            _disk_db.close()
+            _disk_db = None
 
 # Appended to Ollama user prompts to disable internal reasoning (Qwen3, Cogito).
 # Kept off for generate_interactive_reply where thinking improves quality.
 _NO_THINK = " /no_think"
 
-STREAMER_NAMES = [
+STREAMER_NAMES = (
     "the coder", "our code monkey", "the engineer",
     "master coder", "the dev", "chief architect",
-]
-
-
-def _random_streamer() -> str:
-    return random.choice(STREAMER_NAMES)
-
-
-def _system_prompt() -> str:
-    name = _random_streamer()
-    return (
-        "You are a Twitch chat viewer watching a live AI coding stream. "
-        f"Generate short chat messages (under 20 words each) reacting to what {name} just did. "
-        "Be casual, use slang, emojis optional. You are a developer yourself. "
-        "Mix these tones:\n"
-        "- Reference SPECIFIC files, functions, or commands from the context "
-        "(e.g. \"server.py is getting thicc\", \"that grep tho\")\n"
-        "- Give backseat coding suggestions tied to what's actually happening "
-        "(e.g. \"add a try-catch around that fetch\", \"extract that into a helper\")\n"
-        "- Comment on code quality, patterns, or architecture choices "
-        "(e.g. \"nice separation of concerns\", \"watch the cyclomatic complexity\")\n"
-        "- React to errors, edits, or bash commands specifically\n"
-        "- Short hype reactions (max 2 of these)\n"
-        "IMPORTANT: At least 7 of your messages MUST reference specific files, "
-        "tools, code patterns, or commands from the context. Generic messages "
-        "like \"nice\" or \"W\" are okay for at most 2 of the messages.\n"
-        "Return a JSON array of strings, nothing else."
-    )
+)
+
+# Module-local RNG — cosmetic choices don't need the shared global instance
+_rng = random.Random()
+
+
+def _streamer_for(context: str) -> str:
+    """Streamer name for *context* — fixed per context, so repeated prompts
+    stay identical and hit the response cache."""
+    return STREAMER_NAMES[zlib.crc32(context.encode()) % len(STREAMER_NAMES)]
+
+
+# Context sent to the model is capped — the most recent activity matters most
+_MAX_CONTEXT_CHARS = 1500
+_TRAILING_WS = re.compile(r"\s+\n")
+
+
+def _compact_context(context: str, max_chars: int = _MAX_CONTEXT_CHARS) -> str:
+    """Collapse trailing whitespace/blank lines and keep only the tail."""
+    context = _TRAILING_WS.sub("\n", context)
+    if len(context) <= max_chars:
+        return context
+    return "…\n" + context[-max_chars:]
+
+
+# Kept constant (the streamer name lives in the user prompt) so providers with
+# automatic prompt-prefix caching can reuse it across calls.
+SYSTEM_PROMPT_VIEWER = (
+    "You are a Twitch chat viewer watching a live AI coding stream. "
+    "Generate short chat messages (under 20 words each) reacting to what the streamer just did. "
+    "Be casual, use slang, emojis optional. You are a developer yourself. "
+    "Mix these tones:\n"
+    "- Reference SPECIFIC files, functions, or commands from the context "
+    "(e.g. \"server.py is getting thicc\", \"that grep tho\")\n"
+    "- Give backseat coding suggestions tied to what's actually happening "
+    "(e.g. \"add a try-catch around that fetch\", \"extract that into a helper\")\n"
+    "- Comment on code quality, patterns, or architecture choices "
+    "(e.g. \"nice separation of concerns\", \"watch the cyclomatic complexity\")\n"
+    "- React to errors, edits, or bash commands specifically\n"
+    "- Short hype reactions (max 2 of these)\n"
+    "IMPORTANT: At least 7 of your messages MUST reference specific files, "
+    "tools, code patterns, or commands from the context. Generic messages "
+    "like \"nice\" or \"W\" are okay for at most 2 of the messages.\n"
+    "Return a JSON array of strings, nothing else."
+)
 
 SYSTEM_PROMPT_EXPLAIN = (
     "You are a brief coding stream commentator. When asked about an AI agent's actions, "
@@ -146,19 +352,35 @@ def configure(
         ANTHROPIC_MODEL = anthropic_model
     if low_power is not None:
         LOW_POWER = bool(low_power)
+    # New settings deserve a fresh chance
+    _consecutive_failures.clear()
+    _circuit_open_until.clear()
 
 
 def is_ready() -> bool:
-    """Return True if the LLM is configured and usable."""
-    if LLM_PROVIDER == "off":
+    """Return True if the LLM is configured and usable.
+
+    Also False while the provider's circuit breaker is open after repeated
+    failures, so callers fall back instead of piling on.
+    """
+    if time.monotonic() < _circuit_open_until.get(_resolved_provider(), 0.0):
         return False
-    if LLM_PROVIDER == "openai":
-        return bool(OPENAI_KEY and OPENAI_MODEL)
-    if LLM_PROVIDER == "anthropic":
-        return bool(ANTHROPIC_KEY and ANTHROPIC_MODEL)
+    return _READY_CHECKERS.get(LLM_PROVIDER, _ollama_ready)()
+
+
+def _ollama_ready() -> bool:
     return bool(OLLAMA_MODEL)
 
 
+# Readiness check per provider — anything unrecognized is treated as Ollama
+_READY_CHECKERS = {
+    "off": lambda: False,
+    "openai": lambda: bool(OPENAI_KEY and OPENAI_MODEL),
+    "anthropic": lambda: bool(ANTHROPIC_KEY and ANTHROPIC_MODEL),
+    "ollama": _ollama_ready,
+}
+
+
 def get_settings() -> dict:
     """Return current LLM configuration (API keys are masked)."""
     masked_openai = ""
@@ -192,21 +414,104 @@ async def generate_viewer_messages(
     if LOW_POWER:
         count = min(count, 3)
 
-    name = _random_streamer()
-    user_prompt = (
-        f"Here are the last few things {name} did:\n{context}\n\n"
-        f"Generate {count} different short viewer chat messages reacting to this."
-    )
-    system = _system_prompt()
-
+    context = _compact_context(context)
     try:
-        return await _dispatch(user_prompt, system, count=count), ""
+        return await _enqueue_batched(context, count), ""
     except Exception as exc:
         err = str(exc) or type(exc).__name__
         log.warning("LLM viewer-chat call failed: %s", err)
         return [], err
 
 
+async def _enqueue_batched(context: str, count: int) -> list[str]:
+    """Queue a viewer-chat job for the batch worker and await its messages."""
+    global _batch_queue, _batch_task
+    loop = asyncio.get_running_loop()
+    if _batch_task is None or _batch_task.done() or _batch_task.get_loop() is not loop:
+        _batch_queue = asyncio.Queue()
+        _batch_task = loop.create_task(_batch_worker(_batch_queue))
+    fut: asyncio.Future = loop.create_future()
+    await _batch_queue.put((context, count, fut))
+    return await fut
+
+
+async def _batch_worker(queue: asyncio.Queue) -> None:
+    """Drain queued viewer-chat jobs in windows and dispatch each batch."""
+    loop = asyncio.get_running_loop()
+    while True:
+        jobs = [await queue.get()]
+        deadline = loop.time() + _BATCH_WINDOW
+        while len(jobs) < _MAX_BATCH:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                jobs.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        run = loop.create_task(_run_batch(jobs))
+        _batch_runs.add(run)
+        run.add_done_callback(_batch_runs.discard)
+
+
+async def _run_batch(jobs: list[tuple[str, int, asyncio.Future]]) -> None:
+    """Generate messages for a batch of jobs and resolve their futures."""
+    try:
+        if len(jobs) == 1:
+            context, count, _ = jobs[0]
+            name = _streamer_for(context)
+            user_prompt = (
+                f"Here are the last few things {name} did:\n{context}\n\n"
+                f"Generate {count} different short viewer chat messages reacting to this."
+            )
+            results = [await _dispatch(user_prompt, SYSTEM_PROMPT_VIEWER, count=count)]
+        else:
+            counts = [count for _, count, _ in jobs]
+            blocks = "\n\n".join(
+                f"[{i}] ({count} messages) {_streamer_for(context)} did:\n{context}"
+                for i, (context, count, _) in enumerate(jobs, 1)
+            )
+            user_prompt = (
+                f"For each of the {len(jobs)} streamer actions below, generate the "
+                "requested number of different short viewer chat messages. Prefix "
+                "every message with its action number in brackets, e.g. \"[2] nice grep\".\n\n"
+                f"{blocks}"
+            )
+            flat = await _dispatch(user_prompt, SYSTEM_PROMPT_VIEWER, count=sum(counts))
+            results = _split_batch(flat, counts)
+    except asyncio.CancelledError:
+        for _, _, fut in jobs:
+            fut.cancel()
+        raise
+    except Exception as exc:
+        for _, _, fut in jobs:
+            if not fut.done():
+                fut.set_exception(exc)
+        return
+    for (_, _, fut), messages in zip(jobs, results):
+        if not fut.done():
+            fut.set_result(messages)
+
+
+def _split_batch(messages: list[str], counts: list[int]) -> list[list[str]]:
+    """Group ``[n]``-tagged batch output back into per-job message lists."""
+    groups: list[list[str]] = [[] for _ in counts]
+    untagged: list[str] = []
+    for msg in messages:
+        m = _BATCH_TAG.match(msg)
+        idx = int(m.group(1)) - 1 if m else -1
+        text = msg[m.end():] if m else msg
+        if 0 <= idx < len(groups) and text:
+            groups[idx].append(text)
+        elif text:
+            untagged.append(text)
+    # Hand untagged messages to whichever jobs are still short
+    for i, count in enumerate(counts):
+        while untagged and len(groups[i]) < count:
+            groups[i].append(untagged.pop(0))
+    return [g[:count] for g, count in zip(groups, counts)]
+
+
 async def generate_interactive_reply(
     user_message: str,
     event_content: str,
@@ -226,7 +531,7 @@ async def generate_interactive_reply(
     if event_content:
         user_prompt += f"They're asking about this specific event ({event_type}):\n{event_content[:2000]}\n\n"
     if context:
-        user_prompt += f"Recent agent activity for context:\n{context}\n"
+        user_prompt += f"Recent agent activity for context:\n{_compact_context(context)}\n"
 
     try:
         return await _dispatch(user_prompt, SYSTEM_PROMPT_EXPLAIN, raw=True)
@@ -246,7 +551,8 @@ async def generate_narrator_messages(context: str, count: int = 3) -> list[str]:
     if LOW_POWER:
         count = min(count, 1)
 
-    name = _random_streamer()
+    context = _compact_context(context)
+    name = _streamer_for(context)
     user_prompt = (
         f"Here is what {name} just did:\n{context}\n\n"
         f"Generate {count} dramatic play-by-play commentary lines about this."
@@ -286,26 +592,170 @@ async def _dispatch(
     count: int = 5,
     raw: bool = False,
 ) -> list[str] | str:
-    """Route to the configured LLM provider."""
+    """Route to the configured LLM provider, serving repeats from the cache."""
+    key = _cache_key(user_prompt, system_prompt, count, raw)
+    cached = _response_cache.get(key)
+    if cached is not None:
+        stored_at, value = cached
+        if time.monotonic() - stored_at < CACHE_TTL:
+            _response_cache.move_to_end(key)
+            return value
+        del _response_cache[key]
+
+    if DISK_CACHE:
+        value = await asyncio.to_thread(_disk_get, key)
+        if value:
+            _remember(key, value)
+            return value
+
+    # The provider call runs as its own task, so a caller that is cancelled
+    # stops waiting without cancelling the call for everyone sharing it
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch(key, user_prompt, system_prompt, count, raw))
+        task.add_done_callback(_retrieve_exception)
+        _inflight[key] = task
+    return await asyncio.shield(task)
+
+
+async def _fetch(
+    key: str, user_prompt: str, system_prompt: str, count: int, raw: bool
+) -> list[str] | str:
+    """Call the provider for an in-flight key and cache what it returns."""
+    try:
+        result = await _call_provider(user_prompt, system_prompt, count=count, raw=raw)
+        if result:
+            _remember(key, result)
+            if DISK_CACHE:
+                await asyncio.to_thread(_disk_set, key, result)
+        return result
+    finally:
+        _inflight.pop(key, None)
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    """Mark a failure retrieved, so a call every waiter abandoned doesn't log it."""
+    if not task.cancelled():
+        task.exception()
+
+
+def _remember(key: str, value: list[str] | str) -> None:
+    """Store a reply in the in-memory LRU, evicting the oldest if full."""
+    _response_cache[key] = (time.monotonic(), value)
+    _response_cache.move_to_end(key)
+    while len(_response_cache) > _RESPONSE_CACHE_MAX:
+        _response_cache.popitem(last=False)
+
+
+async def _call_provider(
+    user_prompt: str,
+    system_prompt: str = "",
+    *,
+    count: int = 5,
+    raw: bool = False,
+) -> list[str] | str:
+    """Send the prompt to whichever provider is configured."""
+    provider = _resolved_provider()
+    fn = _PROVIDERS[provider]
+    # Ollama: append /no_think unless raw (interactive reply benefits from thinking)
+    prompt = user_prompt if raw or fn is not _call_ollama else user_prompt + _NO_THINK
+    async with _provider_semaphore(provider):
+        try:
+            result = await fn(prompt, system_prompt, count=count, raw=raw)
+        except Exception:
+            _record_failure(provider)
+            raise
+    _consecutive_failures.pop(provider, None)
+    return result
+
+
+def _resolved_provider() -> str:
+    """The provider that is actually called — unrecognized settings mean Ollama."""
+    return LLM_PROVIDER if LLM_PROVIDER in _PROVIDERS else "ollama"
+
+
+def _record_failure(provider: str) -> None:
+    """Count a failed call; trip the breaker after too many in a row."""
+    failures = _consecutive_failures.get(provider, 0) + 1
+    _consecutive_failures[provider] = failures
+    if failures >= _CIRCUIT_THRESHOLD:
+        log.warning("LLM provider %s failed %d times in a row — pausing for %ds",
+                    provider, failures, _CIRCUIT_COOLDOWN)
+        _circuit_open_until[provider] = time.monotonic() + _CIRCUIT_COOLDOWN
+        _consecutive_failures[provider] = 0
+
+
+def _provider_semaphore(provider: str) -> asyncio.Semaphore:
+    """Return the concurrency limiter for *provider*, creating it on first use."""
+    global _semaphores_loop
+    loop = asyncio.get_running_loop()
+    if _semaphores_loop is not loop:
+        _semaphores.clear()
+        _semaphores_loop = loop
+    sem = _semaphores.get(provider)
+    if sem is None:
+        default = _DEFAULT_CONCURRENCY[provider]
+        name = f"AGENTSTV_{provider.upper()}_CONCURRENCY"
+        try:
+            limit = int(os.environ.get(name, default))
+        except ValueError:
+            log.warning("Ignoring invalid %s=%r; using %d", name, os.environ[name], default)
+            limit = default
+        sem = _semaphores[provider] = asyncio.Semaphore(max(1, limit))
+    return sem
+
+
+def _active_model() -> str:
+    """Return the model name for the configured provider."""
     if LLM_PROVIDER == "anthropic":
-        return await _call_anthropic(user_prompt, system_prompt, count=count, raw=raw)
+        return ANTHROPIC_MODEL
     if LLM_PROVIDER == "openai":
-        return await _call_openai(user_prompt, system_prompt, count=count, raw=raw)
-    # Default: ollama — append /no_think unless raw (interactive reply benefits from thinking)
-    prompt = user_prompt if raw else user_prompt + _NO_THINK
-    return await _call_ollama(prompt, system_prompt, count=count, raw=raw)
+        return OPENAI_MODEL
+    return OLLAMA_MODEL
 
 
-async def _retry_on_429(client, method, *args, max_retries=3, **kwargs):
-    """Retry HTTP request with exponential backoff on 429 responses."""
-    import asyncio
+def _cache_key(user_prompt: str, system_prompt: str, count: int, raw: bool) -> str:
+    """Digest of everything that determines a provider reply."""
+    blob = _dumps([LLM_PROVIDER, _active_model(), system_prompt, user_prompt, count, raw])
+    return hashlib.blake2b(blob, digest_size=16).hexdigest()
+
+
+# Transient statuses worth retrying; anything else fails fast
+_RETRY_STATUSES = frozenset((429, 502, 503, 504))
+_RETRY_BASE = 0.25  # seconds, doubled each attempt
+_RETRY_JITTER = 0.1
+_RETRY_MAX_WAIT = 5.0
+
+
+def _retry_delay(attempt: int, resp: httpx.Response | None = None) -> float:
+    """Backoff with jitter for *attempt*, honoring Retry-After (capped)."""
+    delay = _RETRY_BASE * 2 ** attempt + _rng.random() * _RETRY_JITTER
+    if resp is not None:
+        try:
+            delay = max(delay, float(resp.headers.get("retry-after", 0)))
+        except ValueError:
+            pass
+    return min(delay, _RETRY_MAX_WAIT)
+
+
+async def _retry_post(client, url, *, max_retries=3, **kwargs) -> httpx.Response:
+    """POST with jittered backoff on 429/5xx responses and transport errors."""
     for attempt in range(max_retries):
-        resp = await getattr(client, method)(*args, **kwargs)
-        if resp.status_code != 429 or attempt == max_retries - 1:
+        last = attempt == max_retries - 1
+        try:
+            resp = await client.post(url, **kwargs)
+        except httpx.TransportError as exc:
+            if last:
+                raise
+            wait = _retry_delay(attempt)
+            log.warning("%s, retrying in %.2fs (attempt %d/%d)", type(exc).__name__, wait, attempt + 1, max_retries)
+            await asyncio.sleep(wait)
+            continue
+        if resp.status_code not in _RETRY_STATUSES or last:
             resp.raise_for_status()
             return resp
-        wait = 2 ** attempt
-        log.warning("HTTP 429, retrying in %ds (attempt %d/%d)", wait, attempt + 1, max_retries)
+        wait = _retry_delay(attempt, resp)
+        log.warning("HTTP %d, retrying in %.2fs (attempt %d/%d)", resp.status_code, wait, attempt + 1, max_retries)
         await asyncio.sleep(wait)
     return resp  # unreachable but satisfies type checkers
 
@@ -317,27 +767,8 @@ async def _call_anthropic(
     count: int = 5,
     raw: bool = False,
 ) -> list[str] | str:
-    url = "https://api.anthropic.com/v1/messages"
-    headers = {
-        "x-api-key": ANTHROPIC_KEY,
-        "anthropic-version": "2023-06-01",
-        "content-type": "application/json",
-    }
-    payload = {
-        "model": ANTHROPIC_MODEL,
-        "max_tokens": 500 if raw else 300,
-        "system": system_prompt,
-        "messages": [
-            {"role": "user", "content": user_prompt},
-        ],
-    }
-    client = _get_anthropic_client()
-    resp = await _retry_on_429(client, "post", url, json=payload, headers=headers)
-    body = resp.json()
-    text = body["content"][0]["text"]
-    if raw:
-        return text.strip()
-    return _parse_response(text, count)
+    call = _make_anthropic_caller(ANTHROPIC_MODEL, raw, count)
+    return await call(user_prompt, system_prompt)
 
 
 async def _call_ollama(
@@ -347,24 +778,8 @@ async def _call_ollama(
     count: int = 5,
     raw: bool = False,
 ) -> list[str] | str:
-    url = f"{OLLAMA_URL}/api/chat"
-    payload = {
-        "model": OLLAMA_MODEL,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        "stream": False,
-    }
-    if not raw:
-        payload["format"] = "json"
-    client = _get_ollama_client()
-    resp = await _retry_on_429(client, "post", url, json=payload)
-    body = resp.json()
-    text = body["message"]["content"]
-    if raw:
-        return text.strip()
-    return _parse_response(text, count)
+    call = _make_ollama_caller(OLLAMA_URL, OLLAMA_MODEL, raw, count)
+    return await call(user_prompt, system_prompt)
 
 
 async def _call_openai(
@@ -374,52 +789,255 @@ async def _call_openai(
     count: int = 5,
     raw: bool = False,
 ) -> list[str] | str:
-    url = "https://api.openai.com/v1/chat/completions"
-    headers = {"Authorization": f"Bearer {OPENAI_KEY}"}
-    payload = {
-        "model": OPENAI_MODEL,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        "temperature": 1.0,
-        "max_tokens": 300 if not raw else 500,
-    }
-    client = _get_openai_client()
-    resp = await _retry_on_429(client, "post", url, json=payload, headers=headers)
-    body = resp.json()
-    text = body["choices"][0]["message"]["content"]
+    call = _make_openai_caller(OPENAI_MODEL, raw, count)
+    return await call(user_prompt, system_prompt)
+
+
+# Caller factories — each returns a coroutine function specialized for one
+# (model, raw, count) combination, with the URL, static payload fields and
+# reply handling decided once.  Model/URL are part of the cache key so
+# configure() changes take effect; API keys are read per call.
+
+@functools.lru_cache(maxsize=16)
+def _make_anthropic_caller(model: str, raw: bool, count: int):
+    url = f"{ANTHROPIC_BASE_URL}/v1/messages"
+    static = (
+        ("model", model),
+        ("max_tokens", 500 if raw else max(300, 30 * count)),
+    )
+
+    async def call(user_prompt: str, system_prompt: str) -> list[str] | str:
+        headers = {
+            "x-api-key": ANTHROPIC_KEY,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json",
+        }
+        payload = _encode_payload(
+            static,
+            system=system_prompt,
+            messages=[{"role": "user", "content": user_prompt}],
+        )
+        resp = await _retry_post(_get_anthropic_client(), url, content=payload, headers=headers)
+        text = _loads(resp.content)["content"][0]["text"]
+        return text.strip() if raw else _parse_response(text, count)
+
+    return call
+
+
+@functools.lru_cache(maxsize=16)
+def _make_ollama_caller(base_url: str, model: str, raw: bool, count: int):
+    url = f"{base_url}/api/chat"
+    headers = {"content-type": "application/json"}
     if raw:
-        return text.strip()
-    return _parse_response(text, count)
+        static = (("model", model), ("stream", False))
+    else:
+        static = (("model", model), ("stream", True), ("format", "json"))
+
+    async def call(user_prompt: str, system_prompt: str) -> list[str] | str:
+        payload = _encode_payload(
+            static,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+        )
+        client = _get_ollama_client()
+        if not raw:
+            return await _stream_messages(client, url, payload, headers, _ollama_delta, count)
+        resp = await _retry_post(client, url, content=payload, headers=headers)
+        return _loads(resp.content)["message"]["content"].strip()
+
+    return call
+
+
+@functools.lru_cache(maxsize=16)
+def _make_openai_caller(model: str, raw: bool, count: int):
+    url = f"{OPENAI_BASE_URL}/v1/chat/completions"
+    static = (
+        ("model", model),
+        ("temperature", 1.0),
+        ("max_tokens", 500 if raw else max(300, 30 * count)),
+        ("stream", not raw),
+    )
+
+    async def call(user_prompt: str, system_prompt: str) -> list[str] | str:
+        headers = {
+            "Authorization": f"Bearer {OPENAI_KEY}",
+            "content-type": "application/json",
+        }
+        payload = _encode_payload(
+            static,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+        )
+        client = _get_openai_client()
+        if not raw:
+            return await _stream_messages(client, url, payload, headers, _openai_delta, count)
+        resp = await _retry_post(client, url, content=payload, headers=headers)
+        return _loads(resp.content)["choices"][0]["message"]["content"].strip()
+
+    return call
+
+
+# Provider call per LLM_PROVIDER value — anything unrecognized falls back to Ollama
+_PROVIDERS = {
+    "anthropic": _call_anthropic,
+    "openai": _call_openai,
+    "ollama": _call_ollama,
+}
+
+
+def _ollama_delta(line: str) -> str:
+    """Extract the content delta from one Ollama NDJSON stream line."""
+    if not line:
+        return ""
+    try:
+        return _loads(line).get("message", {}).get("content", "")
+    except (json.JSONDecodeError, AttributeError):
+        return ""
+
+
+def _openai_delta(line: str) -> str:
+    """Extract the content delta from one OpenAI SSE stream line."""
+    if not line.startswith("data:"):
+        return ""
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return ""
+    try:
+        choices = _loads(data).get("choices") or [{}]
+        return choices[0].get("delta", {}).get("content") or ""
+    except (json.JSONDecodeError, AttributeError, IndexError):
+        return ""
+
+
+async def _stream_messages(client, url, payload: bytes, headers, delta_of, count, max_retries=3) -> list[str]:
+    """Stream a chat completion, stopping once *count* messages have arrived.
+
+    Leaving the ``client.stream`` block early closes the connection, so a
+    model that overshoots doesn't keep us waiting for the rest of its tokens.
+    Falls back to ``_parse_response`` on the full text if the reply isn't a
+    JSON array of strings.
+    """
+    for attempt in range(max_retries):
+        last = attempt == max_retries - 1
+        scanner = _ArrayStringScanner()
+        parts: list[str] = []
+        try:
+            async with client.stream("POST", url, content=payload, headers=headers) as resp:
+                if resp.status_code in _RETRY_STATUSES and not last:
+                    wait = _retry_delay(attempt, resp)
+                    log.warning("HTTP %d, retrying in %.2fs (attempt %d/%d)", resp.status_code, wait, attempt + 1, max_retries)
+                    await asyncio.sleep(wait)
+                    continue
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    delta = delta_of(line)
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    scanner.feed(delta)
+                    if len(scanner.items) >= count:
+                        return scanner.items[:count]
+        except httpx.TransportError as exc:
+            # Only retry if nothing arrived yet — a half-read stream is not replayable
+            if last or parts:
+                raise
+            wait = _retry_delay(attempt)
+            log.warning("%s, retrying in %.2fs (attempt %d/%d)", type(exc).__name__, wait, attempt + 1, max_retries)
+            await asyncio.sleep(wait)
+            continue
+        return _parse_response("".join(parts), count)
+    return []  # unreachable but satisfies type checkers
+
+
+class _ArrayStringScanner:
+    """Incrementally collect non-empty string elements of JSON arrays.
+
+    Fed arbitrary text chunks; strings are recorded once their closing quote
+    arrives, and only when they sit directly inside an array (object keys
+    and values are ignored).
+    """
+
+    def __init__(self) -> None:
+        self.items: list[str] = []
+        self._stack: list[str] = []
+        self._in_str = False
+        self._escape = False
+        self._buf: list[str] = []
+
+    def feed(self, chunk: str) -> None:
+        for ch in chunk:
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+                    if self._stack and self._stack[-1] == "[":
+                        self._emit("".join(self._buf))
+                    self._buf.clear()
+                    continue
+                self._buf.append(ch)
+            elif ch == '"':
+                self._in_str = True
+            elif ch in "[{":
+                self._stack.append(ch)
+            elif ch in "]}":
+                if self._stack:
+                    self._stack.pop()
+
+    def _emit(self, raw: str) -> None:
+        try:
+            value = _loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            value = raw
+        if value:
+            self.items.append(value)
+
+
+# Wrapper keys models use for {"messages": [...]}-style replies
+_LIST_KEY_ORDER = ("messages", "chat", "responses", "items")
+_LIST_KEYS = frozenset(_LIST_KEY_ORDER)
+
+# Leading numbering/bullets/quotes and trailing quotes on fallback lines
+_STRIP_LINE = re.compile(r'^[0-9.\-)\s"\']+|["\'\s]+$')
 
 
 def _parse_response(text: str, count: int) -> list[str]:
     """Parse LLM response into a list of message strings."""
     text = text.strip()
-    try:
-        data = json.loads(text)
-        # Handle {"messages": [...]} or just [...]
-        if isinstance(data, dict):
-            for key in ("messages", "chat", "responses", "items"):
-                if key in data and isinstance(data[key], list):
-                    data = data[key]
-                    break
-            else:
-                # Take first list value found
-                for v in data.values():
-                    if isinstance(v, list):
-                        data = v
-                        break
+    if text[:1] == "[" and text[-1:] == "]":
+        # Fast path: well-behaved models reply with a bare JSON array
+        try:
+            return [str(m) for m in _loads(text) if m][:count]
+        except json.JSONDecodeError:
+            pass
+    else:
+        try:
+            data = _loads(text)
+            # Handle {"messages": [...]}
+            if isinstance(data, dict):
+                # Known wrapper keys first (in priority order), else the first list value
+                found = None
+                if not _LIST_KEYS.isdisjoint(data):
+                    found = next((data[k] for k in _LIST_KEY_ORDER if isinstance(data.get(k), list)), None)
+                if found is None:
+                    found = next((v for v in data.values() if isinstance(v, list)), None)
+                if found is not None:
+                    data = found
                 else:
                     # Dict with only string values — extract them
                     strings = [str(v) for v in data.values() if v and isinstance(v, str)]
                     if strings:
                         return strings[:count]
-        if isinstance(data, list):
-            return [str(m) for m in data if m][:count]
-    except json.JSONDecodeError:
-        pass
+            if isinstance(data, list):
+                return [str(m) for m in data if m][:count]
+        except json.JSONDecodeError:
+            pass
     # Fallback: split by newlines, strip numbering
-    lines = [ln.strip().lstrip("0123456789.-) ").strip('"\'') for ln in text.splitlines()]
+    lines = [_STRIP_LINE.sub("", ln) for ln in text.splitlines()]
     return [ln for ln in lines if ln and len(ln) < 100][:count]
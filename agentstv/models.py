@@ -3,24 +3,31 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import IntEnum
 from pathlib import Path
 
 
-class EventType(str, Enum):
-    SPAWN = "spawn"
-    THINK = "think"
-    TOOL_CALL = "tool_call"
-    TOOL_RESULT = "tool_result"
-    FILE_CREATE = "file_create"
-    FILE_UPDATE = "file_update"
-    FILE_READ = "file_read"
-    BASH = "bash"
-    WEB_SEARCH = "web_search"
-    TEXT = "text"
-    ERROR = "error"
-    COMPLETE = "complete"
-    USER = "user"
+class EventType(IntEnum):
+    SPAWN = 0
+    THINK = 1
+    TOOL_CALL = 2
+    TOOL_RESULT = 3
+    FILE_CREATE = 4
+    FILE_UPDATE = 5
+    FILE_READ = 6
+    BASH = 7
+    WEB_SEARCH = 8
+    TEXT = 9
+    ERROR = 10
+    COMPLETE = 11
+    USER = 12
+
+
+# Wire names for each EventType, indexed by value (what the frontend sees)
+_TYPE_NAMES: tuple[str, ...] = (
+    "spawn", "think", "tool_call", "tool_result", "file_create", "file_update",
+    "file_read", "bash", "web_search", "text", "error", "complete", "user",
+)
 
 
 def _summarize(text: str, max_len: int = 120) -> str:
@@ -42,7 +49,7 @@ def _short_path(path: str) -> str:
     return str(p.name) if len(parts) <= 1 else str(Path(*parts[-2:]))
 
 
-@dataclass
+@dataclass(slots=True)
 class Event:
     timestamp: str
     type: EventType
@@ -53,11 +60,13 @@ class Event:
     output_tokens: int = 0
     cache_read_tokens: int = 0
     content: str = ""
+    ts_ns: int = 0  # timestamp as ns since epoch, filled in by the parser for sorting
+    public_dict: dict | None = field(default=None, repr=False, compare=False)  # cached redacted to_dict()
 
     def to_dict(self) -> dict:
         return {
             "timestamp": self.timestamp,
-            "type": self.type.value,
+            "type": _TYPE_NAMES[self.type],
             "agent_id": self.agent_id,
             "tool_name": self.tool_name,
             "file_path": self.file_path,
@@ -70,7 +79,7 @@ class Event:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Agent:
     id: str
     name: str
@@ -94,7 +103,7 @@ class Agent:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Session:
     id: str
     slug: str = ""
@@ -2,17 +2,40 @@
 
 from __future__ import annotations
 
+import functools
+import heapq
 import json
+import operator
+import os
+import re
+import sys
 import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Any, Callable, Tuple
 
 from .models import Agent, Event, EventType, Session
 
-# Parse cache: keyed on (resolved_path, mtime) -> Session
-_parse_cache: Dict[Tuple[str, float], Session] = {}
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional speedup — stdlib json works fine
+    orjson = None
+    _loads = json.loads
+
+# Parse cache (LRU): file identity -> ((mtime_ns, size), cached_at, Session, format, tail).
+# Identity is (st_dev, st_ino) so hard links share one entry; the resolved
+# path is used where the filesystem reports no inode.  The detected format
+# outlives the signature: a transcript that grows keeps its format.  JSONL
+# entries keep a _Tail so appended records can be decoded on their own.
+_parse_cache: "OrderedDict[object, Tuple[Tuple[int, int], float, Session, str | None, _Tail | None]]" = OrderedDict()
 _parse_cache_lock = threading.Lock()
 _PARSE_CACHE_MAX = 64
+_PARSE_CACHE_TTL = 1800.0  # seconds — drop sessions nobody has looked at in a while
 
 # Agent colors assigned round-robin to sub-agents
 AGENT_COLORS = ["magenta", "yellow", "green", "red", "blue", "white"]
@@ -31,104 +54,377 @@ TOOL_TYPE_MAP = {
 }
 
 
+def _json_snippet(obj, limit: int) -> str:
+    """Serialize *obj* to JSON for display, truncated to *limit* characters.
+
+    orjson encodes straight to bytes, so the slice happens before any str is
+    built.  Objects orjson rejects (non-str keys, huge ints) use stdlib json.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)[:limit].decode("utf-8", "ignore")
+        except TypeError:
+            pass
+    return json.dumps(obj)[:limit]
+
+
+def _intern(value: Any) -> Any:
+    """Intern small-vocabulary strings (tool names, agent ids, file paths).
+
+    Thousands of events share a handful of these values; interning makes
+    them share one object.  Non-strings from malformed records pass through.
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
+_event_ts = operator.attrgetter("timestamp")
+_event_ts_ns = operator.attrgetter("ts_ns")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Fractional seconds; fromisoformat before 3.11 only takes 3 or 6 digits
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+def _ts_to_ns(ts: str) -> int:
+    """Parse an ISO-8601 timestamp to integer ns since the epoch (0 if empty).
+
+    Naive timestamps are taken as UTC, and fractional seconds of any length
+    are accepted (precision below a microsecond is dropped).  Raises
+    ValueError if unparseable.
+    """
+    if not ts:
+        return 0
+    if ts[-1] == "Z":
+        ts = ts[:-1] + "+00:00"
+    m = _FRACTION.search(ts)
+    if m is not None and len(m.group(1)) != 6:
+        ts = ts[:m.start(1)] + m.group(1)[:6].ljust(6, "0") + ts[m.end(1):]
+    dt = datetime.fromisoformat(ts)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    d = dt - _EPOCH
+    return (d.days * 86_400 + d.seconds) * 1_000_000_000 + d.microseconds * 1_000
+
+
+def _sort_key(streams: list[list[Event]]) -> Callable[[Event], Any]:
+    """Fill in ``ts_ns`` on every event and return the key to order them by.
+
+    Integer keys compare much faster than the ISO strings.  Events of one
+    record share a timestamp string, so each distinct string is parsed once.
+    Every event gets a ``ts_ns`` — an unparseable timestamp counts as 0, like
+    a missing one — so event lists from different parses can be merged on it.
+    """
+    memo: dict[str, int] = {}
+    for events in streams:
+        for e in events:
+            ts = e.timestamp
+            ns = memo.get(ts)
+            if ns is None:
+                try:
+                    ns = _ts_to_ns(ts)
+                except (ValueError, TypeError):
+                    ns = 0
+                memo[ts] = ns
+            e.ts_ns = ns
+    return _event_ts_ns
+
+
+def _is_chronological(events: list[Event], key: Callable[[Event], Any] = _event_ts) -> bool:
+    """True if *events* are already in non-decreasing *key* order."""
+    keys = list(map(key, events))
+    return all(a <= b for a, b in zip(keys, keys[1:]))
+
+
+def _sort_events(events: list[Event]) -> None:
+    """Sort *events* in place by time, skipping the sort if already ordered."""
+    key = _sort_key([events])
+    if not _is_chronological(events, key):
+        events.sort(key=key)
+
+
+def _merge_streams(streams: list[list[Event]]) -> list[Event]:
+    """Merge per-agent event lists into one time-ordered list.
+
+    Transcripts are appended in order, so each stream is normally sorted
+    already and a k-way merge replaces a full sort.  Streams that are not
+    (clock skew, hand-edited files) are sorted first.  Ties keep stream
+    order, matching a stable sort over the concatenation.
+    """
+    key = _sort_key(streams)
+    for events in streams:
+        if not _is_chronological(events, key):
+            events.sort(key=key)
+    if len(streams) == 1:
+        return streams[0]
+    return list(heapq.merge(*streams, key=key))
+
+
 def auto_detect(file_path: str | Path) -> str:
     """Detect transcript format.
 
     Returns 'claude_code', 'codex', or 'gemini'.
     """
-    file_path = Path(file_path)
+    return _sniff_format(Path(file_path)) or "codex"
+
+
+def _sniff_format(file_path: Path) -> str | None:
+    """Detect transcript format, or None if no record identifies one.
 
+    JSONL transcripts are sniffed from a _SNIFF_BYTES prefix, so the cost
+    does not grow with the file.  The prefix is only extended when it does
+    not yet hold one complete line (a very long first record), by at most
+    _SNIFF_MAX_LINE bytes.
+    """
     # Gemini CLI stores sessions as JSON (not JSONL) in ~/.gemini/
     if file_path.suffix == ".json":
         try:
-            with open(file_path, encoding="utf-8") as f:
-                data = json.load(f)
+            with open(file_path, "rb") as f:
+                data = _loads(f.read())
             if isinstance(data, dict) and "messages" in data:
                 return "gemini"
             if isinstance(data, list) and data and isinstance(data[0], dict):
                 first = data[0]
                 if first.get("role") in ("user", "model"):
                     return "gemini"
-        except (json.JSONDecodeError, OSError):
+        except (ValueError, OSError):
             pass
 
-    with open(file_path, encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                rec = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            # Claude Code transcripts have these type fields
-            if rec.get("type") in ("file-history-snapshot",):
-                return "claude_code"
-            if "sessionId" in rec and rec.get("type") in (
-                "user",
-                "assistant",
-                "progress",
-            ):
-                return "claude_code"
-            # Codex CLI rollout files have these record types
-            if rec.get("type") in ("session_meta", "response_item", "event_msg"):
-                return "codex"
-            # Codex legacy: type=message with role field
-            if rec.get("type") == "message" and "role" in rec:
-                return "codex"
-            # Gemini JSONL format
-            if rec.get("type") in ("session_metadata",):
-                return "gemini"
-            if rec.get("type") in ("user", "gemini") and "content" in rec:
-                # Gemini uses type="user"/"gemini"; Claude uses type="user" with sessionId
-                if "sessionId" not in rec:
-                    return "gemini"
-            # Codex turn_context events
-            if rec.get("type") == "turn_context":
-                return "codex"
-    return "codex"
+    with open(file_path, "rb") as f:
+        head = f.read(_SNIFF_BYTES)
+        if len(head) == _SNIFF_BYTES and b"\n" not in head:
+            # Finish the first line in one buffered read, up to a cap
+            head += f.readline(_SNIFF_MAX_LINE)
+        at_eof = len(head) < _SNIFF_BYTES or not f.read(1)
+
+    lines = head.split(b"\n")
+    if not at_eof:
+        lines.pop()  # the prefix may end mid-record
+    # Every format identifies itself on its first record, so this normally
+    # returns after decoding a single line
+    for line in lines:
+        # Only objects can identify a format; skip anything else undecoded
+        line = line.lstrip()
+        if not line.startswith(b"{"):
+            continue
+        try:
+            rec = _loads(line)
+        except ValueError:
+            continue
+        fmt = _detect_record(rec)
+        if fmt:
+            return fmt
+    return None
+
+
+def _detect_records(records: list[dict]) -> str | None:
+    """Return the format the first identifying decoded record names, or None."""
+    for rec in records:
+        if isinstance(rec, dict):
+            fmt = _detect_record(rec)
+            if fmt:
+                return fmt
+    return None
+
+
+# Bytes read from the head of a JSONL transcript to detect its format
+_SNIFF_BYTES = 4096
+# Most extra bytes read to complete an oversized first record
+_SNIFF_MAX_LINE = 16 * 1024 * 1024
+
+# Record types that identify a transcript format on their own
+_FORMAT_BY_TYPE = {
+    # Claude Code
+    "file-history-snapshot": "claude_code",
+    # Codex CLI rollout files
+    "session_meta": "codex",
+    "response_item": "codex",
+    "event_msg": "codex",
+    "turn_context": "codex",
+    # Gemini JSONL
+    "session_metadata": "gemini",
+}
+
+# Claude Code conversation record types that carry a sessionId
+_CLAUDE_SESSION_TYPES = frozenset({"user", "assistant", "progress"})
+
+
+def _detect_record(rec: dict) -> str | None:
+    """Return the format a single decoded record identifies, or None."""
+    rec_type = rec.get("type")
+    fmt = _FORMAT_BY_TYPE.get(rec_type)
+    if fmt:
+        return fmt
+    # Codex legacy: type=message with role field
+    if rec_type == "message" and "role" in rec:
+        return "codex"
+    # Claude Code stamps sessionId on its conversation records; other
+    # formats may carry one too, so the record type must match as well
+    if "sessionId" in rec and rec_type in _CLAUDE_SESSION_TYPES:
+        return "claude_code"
+    # Gemini uses type="user"/"gemini"; Claude uses type="user" with sessionId
+    if rec_type in ("user", "gemini") and "content" in rec:
+        return "gemini"
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def _real_path(file_path: str | Path) -> str:
+    """Canonical path, memoized — used as the cache key without an inode."""
+    return os.path.realpath(file_path)
 
 
 def parse(file_path: str | Path) -> Session:
     """Auto-detect format and parse a transcript file.
 
-    Results are cached by (resolved_path, mtime) so repeated calls for an
-    unchanged file skip all I/O and parsing.
+    Results are cached per file and reused while its nanosecond mtime and
+    size are unchanged, so repeated calls skip all I/O and parsing.  When a
+    JSONL transcript has only grown, just the appended lines are decoded
+    and added to a copy of the cached Session; a Session already returned
+    is never modified, so callers can hold on to it.  The cache is
+    LRU — recently viewed sessions stay resident — and entries expire
+    _PARSE_CACHE_TTL seconds after they were last read.
     """
-    p = Path(file_path).resolve()
+    # os.stat follows symlinks itself, so the common path needs no resolve();
+    # the real path is only worked out when there is no inode to key on
     try:
-        mtime = p.stat().st_mtime
+        st = os.stat(file_path)
+        key = (st.st_dev, st.st_ino) if st.st_ino else _real_path(file_path)
+        sig = (st.st_mtime_ns, st.st_size)
     except OSError:
-        mtime = 0.0
-    key = (str(p), mtime)
+        key = _real_path(file_path)
+        sig = (0, 0)
 
+    now = time.monotonic()
     with _parse_cache_lock:
         cached = _parse_cache.get(key)
-        if cached is not None:
-            return cached
+        if cached is not None and cached[0] == sig and now - cached[1] < _PARSE_CACHE_TTL:
+            # A hit counts as use: the TTL runs from the last time it was read
+            _parse_cache[key] = (sig, now) + cached[2:]
+            _parse_cache.move_to_end(key)
+            return cached[2]
+
+    # A transcript that has only grown is caught up from where the last
+    # read stopped, instead of decoding the whole file again
+    path = Path(file_path)
+    if cached is not None and cached[4] is not None and now - cached[1] < _PARSE_CACHE_TTL:
+        _, _, _, fmt, tail = cached
+        session = _catch_up(path, fmt, tail, sig[1])
+        if session is not None:
+            _cache_store(key, (sig, now, session, fmt, tail))
+            return session
+
+    # A changed file keeps its format — only sniff until one is identified
+    fmt = cached[3] if cached is not None else None
+    records = None
+    tail = None
+    if path.suffix == ".json":
+        if fmt is None:
+            fmt = _sniff_format(path)
+    else:
+        # Decode the transcript once; the records serve detection and parsing
+        records, end, n_lines = _read_jsonl_from(path)
+        if fmt is None:
+            fmt = _detect_records(records)
+        if n_lines >= 0:
+            tail = _Tail(end, n_lines)
 
-    fmt = auto_detect(file_path)
     if fmt == "claude_code":
-        session = parse_claude_code(file_path)
+        session = parse_claude_code(file_path, records, tail.tokens if tail else None)
+        if tail is not None and _has_subagent_dir(path, session.id):
+            tail = None  # sub-agent transcripts change on their own; always reparse
     elif fmt == "gemini":
-        session = parse_gemini(file_path)
+        session = parse_gemini(file_path, records)
     else:
-        session = parse_codex(file_path)
+        session = parse_codex(file_path, records)
+    if tail is not None:
+        tail.session = session
+
+    _cache_store(key, (sig, now, session, fmt, tail))
+    return session
+
 
+def _cache_store(key: object, entry: tuple) -> None:
+    """Insert or replace a parse cache entry, evicting least recently used."""
     with _parse_cache_lock:
-        # Evict stale entries for the same path (old mtimes)
-        stale_keys = [k for k in _parse_cache if k[0] == str(p) and k[1] != mtime]
-        for sk in stale_keys:
-            del _parse_cache[sk]
-        # Evict oldest entry if cache is still full
-        if len(_parse_cache) >= _PARSE_CACHE_MAX:
-            oldest = next(iter(_parse_cache))
-            del _parse_cache[oldest]
-        _parse_cache[key] = session
+        _parse_cache[key] = entry
+        _parse_cache.move_to_end(key)
+        while len(_parse_cache) > _PARSE_CACHE_MAX:
+            _parse_cache.popitem(last=False)
+
+
+@dataclass(slots=True)
+class _Tail:
+    """Where to resume reading a growing JSONL transcript."""
+
+    offset: int  # byte offset just past the last consumed line
+    lines: int  # lines consumed so far, counted against MAX_JSONL_LINES
+    tokens: tuple[set[str], set[str]] = field(default_factory=lambda: (set(), set()))
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    session: Session | None = None  # the Session holding everything up to offset
+
+
+def _catch_up(file_path: Path, fmt: str, tail: _Tail, size: int) -> Session | None:
+    """Decode only the records appended since the last read.
+
+    Returns a new Session (the tail's Session plus the appended records),
+    leaving the previous one untouched for whoever is still reading it.
+    Returns None when a full parse is needed instead: the file did not grow
+    (it may have been rewritten in place), the line cap would be reached,
+    or Claude sub-agent transcripts have appeared.
+    """
+    with tail.lock:
+        prev = tail.session
+        if prev is None or size <= tail.offset:
+            return None
+        if fmt == "claude_code" and _has_subagent_dir(file_path, prev.id):
+            return None
+        records, end, n_lines = _read_jsonl_from(file_path, tail.offset, MAX_JSONL_LINES - tail.lines)
+        if n_lines < 0:
+            return None
+
+        # Copy the event list and the (token-counting) agents; events
+        # themselves are never modified once parsed and are shared
+        session = replace(
+            prev,
+            agents={k: replace(a) for k, a in prev.agents.items()},
+            events=list(prev.events),
+        )
+        start = len(session.events)
+        main_agent = session.agents["main"]
+        if fmt == "claude_code":
+            meta: dict = {}
+            _process_lines(records, "main", session, meta if session.id == "unknown" else None, tail.tokens)
+            if "id" in meta:
+                _apply_claude_meta(session, meta)
+        elif fmt == "gemini":
+            _parse_gemini_jsonl(file_path, session, main_agent, records)
+        else:
+            _apply_codex_records(records, session, main_agent)
+        _order_appended(session, start)
+
+        if session.events:
+            if fmt != "claude_code" and not session.start_time:
+                session.start_time = session.events[0].timestamp
+            if not main_agent.spawn_time:
+                main_agent.spawn_time = session.events[0].timestamp
+        tail.offset = end
+        tail.lines += n_lines
+        tail.session = session
     return session
 
 
-def parse_codex(file_path: str | Path) -> Session:
+def _order_appended(session: Session, start: int) -> None:
+    """Keep events time-ordered after appending from index *start*."""
+    events = session.events
+    new = events[start:]
+    if not new:
+        return
+    key = _sort_key([new])
+    if _is_chronological(new, key) and (not start or key(events[start - 1]) <= key(new[0])):
+        return
+    events.sort(key=_sort_key([events]))
+
+
+def parse_codex(file_path: str | Path, records: list[dict] | None = None) -> Session:
     """Parse a Codex CLI rollout JSONL transcript into a Session.
 
     Codex CLI writes rollout files to ~/.codex/sessions/YYYY/MM/DD/rollout-*.jsonl.
@@ -142,161 +438,175 @@ def parse_codex(file_path: str | Path) -> Session:
     - ``event_msg`` lines with ``payload.type == "token_count"`` carry token
       usage in ``payload.info.last_token_usage``.
     - ``session_meta`` provides the session timestamp and model name.
+
+    Pass *records* to reuse lines already decoded from *file_path*.
     """
     file_path = Path(file_path)
     session = Session(id=file_path.stem)
     main_agent = Agent(id="main", name="Codex", color="green")
     session.agents["main"] = main_agent
 
-    lines = _read_jsonl(file_path)
+    lines = records if records is not None else _read_jsonl(file_path)
 
-    for rec in lines:
-        rec_type = rec.get("type", "")
-        timestamp = rec.get("timestamp", "")
+    _apply_codex_records(lines, session, main_agent)
 
-        # --- session_meta: first line with session-level info ---
-        if rec_type == "session_meta":
-            session.start_time = timestamp
-            session.version = rec.get("model", "")
-            continue
+    # Records are appended in order; only sort if the file says otherwise
+    _sort_events(session.events)
 
-        # --- response_item: conversation messages and tool calls ---
-        if rec_type == "response_item":
-            item = rec.get("item", {})
-            item_type = item.get("type", "")
-            role = item.get("role", "")
+    # Derive start_time from first event if not set via session_meta
+    if not session.start_time and session.events:
+        session.start_time = session.events[0].timestamp
 
-            if item_type == "message":
-                content = _extract_codex_content(item.get("content", []))
-                if role == "user":
-                    session.events.append(
-                        Event(
-                            timestamp=timestamp,
-                            type=EventType.USER,
-                            agent_id="main",
-                            content=content,
-                        )
-                    )
-                else:
-                    session.events.append(
-                        Event(
-                            timestamp=timestamp,
-                            type=EventType.TEXT,
-                            agent_id="main",
-                            content=content,
-                        )
-                    )
+    # Set agent spawn time
+    if session.events:
+        main_agent.spawn_time = session.events[0].timestamp
 
-            elif item_type == "function_call":
-                tool_name = item.get("name", "unknown")
-                arguments = item.get("arguments", "")
-                event_type = EventType.BASH if tool_name == "shell" else EventType.TOOL_CALL
-                if tool_name in ("write_file", "create_file"):
-                    event_type = EventType.FILE_CREATE
-                elif tool_name in ("edit_file", "patch"):
-                    event_type = EventType.FILE_UPDATE
-                elif tool_name == "read_file":
-                    event_type = EventType.FILE_READ
-                session.events.append(
-                    Event(
-                        timestamp=timestamp,
-                        type=event_type,
-                        agent_id="main",
-                        tool_name=tool_name,
-                        content=arguments[:500] if arguments else tool_name,
-                    )
-                )
+    return session
 
-            elif item_type == "function_call_output":
-                output = item.get("output", "")
-                session.events.append(
-                    Event(
-                        timestamp=timestamp,
-                        type=EventType.TOOL_RESULT,
-                        agent_id="main",
-                        content=output[:2000] if output else "",
-                    )
-                )
-            continue
 
-        # --- Legacy format: type=message with role ---
-        if rec_type == "message" and "role" in rec:
-            role = rec.get("role", "")
-            content = _extract_codex_content(rec.get("content", []))
-            if role == "user":
-                session.events.append(
-                    Event(
-                        timestamp=timestamp,
-                        type=EventType.USER,
-                        agent_id="main",
-                        content=content,
-                    )
-                )
-            elif role == "assistant":
-                session.events.append(
-                    Event(
-                        timestamp=timestamp,
-                        type=EventType.TEXT,
-                        agent_id="main",
-                        content=content,
-                    )
-                )
-            continue
+# --- Codex record handlers, dispatched on the record ``type`` ---
 
-        # --- event_msg: token counts ---
-        if rec_type == "event_msg":
-            payload = rec.get("payload", rec.get("msg", {}))
-            if isinstance(payload, dict) and payload.get("type") == "token_count":
-                info = payload.get("info") or {}
-                usage = info.get("last_token_usage") or {}
-                in_tok = usage.get("input_tokens", 0)
-                out_tok = usage.get("output_tokens", 0)
-                cache_tok = usage.get("cached_input_tokens", 0) or usage.get(
-                    "cache_read_input_tokens", 0
-                )
-                main_agent.input_tokens += in_tok
-                main_agent.output_tokens += out_tok
-                main_agent.cache_read_tokens += cache_tok
-            continue
 
-        # --- turn_context: model info ---
-        if rec_type == "turn_context":
-            payload = rec.get("payload", {})
-            model = payload.get("model", "")
-            if model:
-                session.version = model
-            continue
+def _codex_session_meta(rec: dict, session: Session, agent: Agent) -> None:
+    """session_meta: first line with session-level info."""
+    session.start_time = rec.get("timestamp", "")
+    session.version = rec.get("model", "")
 
-    # Sort events by timestamp
-    session.events.sort(key=lambda e: e.timestamp)
 
-    # Derive start_time from first event if not set via session_meta
-    if not session.start_time and session.events:
-        session.start_time = session.events[0].timestamp
+def _codex_response_item(rec: dict, session: Session, agent: Agent) -> None:
+    """response_item: conversation messages and tool calls."""
+    timestamp = rec.get("timestamp", "")
+    item = rec.get("item", {})
+    item_type = item.get("type", "")
 
-    # Set agent spawn time
-    if session.events:
-        main_agent.spawn_time = session.events[0].timestamp
+    if item_type == "message":
+        content = _extract_codex_content(item.get("content", []))
+        session.events.append(
+            Event(
+                timestamp=timestamp,
+                type=EventType.USER if item.get("role", "") == "user" else EventType.TEXT,
+                agent_id="main",
+                content=content,
+            )
+        )
 
-    return session
+    elif item_type == "function_call":
+        tool_name = _intern(item.get("name", "unknown"))
+        arguments = item.get("arguments", "")
+        event_type = EventType.BASH if tool_name == "shell" else EventType.TOOL_CALL
+        if tool_name in ("write_file", "create_file"):
+            event_type = EventType.FILE_CREATE
+        elif tool_name in ("edit_file", "patch"):
+            event_type = EventType.FILE_UPDATE
+        elif tool_name == "read_file":
+            event_type = EventType.FILE_READ
+        session.events.append(
+            Event(
+                timestamp=timestamp,
+                type=event_type,
+                agent_id="main",
+                tool_name=tool_name,
+                content=arguments[:500] if arguments else tool_name,
+            )
+        )
+
+    elif item_type == "function_call_output":
+        output = item.get("output", "")
+        session.events.append(
+            Event(
+                timestamp=timestamp,
+                type=EventType.TOOL_RESULT,
+                agent_id="main",
+                content=output[:2000] if output else "",
+            )
+        )
+
+
+def _codex_message(rec: dict, session: Session, agent: Agent) -> None:
+    """Legacy format: type=message with role."""
+    if "role" not in rec:
+        return
+    role = rec.get("role", "")
+    if role == "user":
+        event_type = EventType.USER
+    elif role == "assistant":
+        event_type = EventType.TEXT
+    else:
+        return
+    session.events.append(
+        Event(
+            timestamp=rec.get("timestamp", ""),
+            type=event_type,
+            agent_id="main",
+            content=_extract_codex_content(rec.get("content", [])),
+        )
+    )
+
+
+def _codex_event_msg(rec: dict, session: Session, agent: Agent) -> None:
+    """event_msg: token counts."""
+    payload = rec.get("payload", rec.get("msg", {}))
+    if isinstance(payload, dict) and payload.get("type") == "token_count":
+        info = payload.get("info") or {}
+        usage = info.get("last_token_usage") or {}
+        in_tok = usage.get("input_tokens", 0)
+        out_tok = usage.get("output_tokens", 0)
+        cache_tok = usage.get("cached_input_tokens", 0) or usage.get(
+            "cache_read_input_tokens", 0
+        )
+        agent.input_tokens += in_tok
+        agent.output_tokens += out_tok
+        agent.cache_read_tokens += cache_tok
+
+
+def _codex_turn_context(rec: dict, session: Session, agent: Agent) -> None:
+    """turn_context: model info."""
+    payload = rec.get("payload", {})
+    model = payload.get("model", "")
+    if model:
+        session.version = model
+
+
+def _apply_codex_records(records: list[dict], session: Session, agent: Agent) -> None:
+    """Feed Codex records through their handlers."""
+    # One hashed lookup per record instead of an if-chain on the type
+    handlers = _CODEX_HANDLERS
+    for rec in records:
+        handler = handlers.get(rec.get("type", ""))
+        if handler is not None:
+            handler(rec, session, agent)
+
+
+_CODEX_HANDLERS = {
+    "session_meta": _codex_session_meta,
+    "response_item": _codex_response_item,
+    "message": _codex_message,
+    "event_msg": _codex_event_msg,
+    "turn_context": _codex_turn_context,
+}
 
 
 def _extract_codex_content(content: str | list) -> str:
     """Extract text from a Codex content field (string or content blocks)."""
-    if isinstance(content, str):
+    if type(content) is str:  # the common case
         return content
-    if isinstance(content, list):
+    if type(content) is list:
         parts = []
         for block in content:
-            if isinstance(block, str):
-                parts.append(block)
-            elif isinstance(block, dict):
-                parts.append(block.get("text", block.get("content", "")))
-        return "\n".join(p for p in parts if p)
+            if type(block) is str:
+                text = block
+            elif type(block) is dict:
+                text = block["text"] if "text" in block else block.get("content", "")
+            else:
+                continue
+            if text:
+                parts.append(text)
+        # join() on a list sizes the result in one pass; a genexp is listified first
+        return "\n".join(parts)
     return str(content) if content else ""
 
 
-def parse_gemini(file_path: str | Path) -> Session:
+def parse_gemini(file_path: str | Path, records: list[dict] | None = None) -> Session:
     """Parse a Gemini CLI session log into a Session.
 
     Gemini CLI currently stores sessions as JSON files in
@@ -313,6 +623,8 @@ def parse_gemini(file_path: str | Path) -> Session:
       array of ``{text: "..."}`` objects.
     - Tool calls appear as ``functionCall`` parts (legacy) or within content
       blocks (JSONL).
+
+    Pass *records* to reuse JSONL lines already decoded from *file_path*.
     """
     file_path = Path(file_path)
     session = Session(id=file_path.stem)
@@ -323,10 +635,10 @@ def parse_gemini(file_path: str | Path) -> Session:
     if file_path.suffix == ".json":
         _parse_gemini_json(file_path, session, main_agent)
     else:
-        _parse_gemini_jsonl(file_path, session, main_agent)
+        _parse_gemini_jsonl(file_path, session, main_agent, records)
 
     # Sort events and set metadata
-    session.events.sort(key=lambda e: e.timestamp)
+    _sort_events(session.events)
     if session.events:
         if not session.start_time:
             session.start_time = session.events[0].timestamp
@@ -337,8 +649,8 @@ def parse_gemini(file_path: str | Path) -> Session:
 
 def _parse_gemini_json(file_path: Path, session: Session, agent: Agent) -> None:
     """Parse legacy Gemini CLI JSON session file."""
-    with open(file_path, encoding="utf-8") as f:
-        data = json.load(f)
+    with open(file_path, "rb") as f:
+        data = _loads(f.read())
 
     messages: list = []
     if isinstance(data, dict):
@@ -375,7 +687,7 @@ def _parse_gemini_json(file_path: Path, session: Session, agent: Agent) -> None:
             # Function calls (tool use)
             fc = part.get("functionCall")
             if fc and isinstance(fc, dict):
-                tool_name = fc.get("name", "unknown")
+                tool_name = _intern(fc.get("name", "unknown"))
                 args = fc.get("args", {})
                 event_type = EventType.BASH if tool_name in ("run_shell", "shell") else EventType.TOOL_CALL
                 if "edit" in tool_name.lower() or "update" in tool_name.lower():
@@ -390,7 +702,7 @@ def _parse_gemini_json(file_path: Path, session: Session, agent: Agent) -> None:
                         type=event_type,
                         agent_id="main",
                         tool_name=tool_name,
-                        content=json.dumps(args)[:500] if args else tool_name,
+                        content=_json_snippet(args, 500) if args else tool_name,
                     )
                 )
 
@@ -403,14 +715,16 @@ def _parse_gemini_json(file_path: Path, session: Session, agent: Agent) -> None:
                         timestamp=timestamp,
                         type=EventType.TOOL_RESULT,
                         agent_id="main",
-                        content=json.dumps(response)[:2000] if response else "",
+                        content=_json_snippet(response, 2000) if response else "",
                     )
                 )
 
 
-def _parse_gemini_jsonl(file_path: Path, session: Session, agent: Agent) -> None:
+def _parse_gemini_jsonl(
+    file_path: Path, session: Session, agent: Agent, records: list[dict] | None = None
+) -> None:
     """Parse Gemini CLI JSONL session file."""
-    lines = _read_jsonl(file_path)
+    lines = records if records is not None else _read_jsonl(file_path)
 
     for rec in lines:
         rec_type = rec.get("type", "")
@@ -434,7 +748,7 @@ def _parse_gemini_jsonl(file_path: Path, session: Session, agent: Agent) -> None
                     # Tool calls in content blocks
                     fc = block.get("functionCall")
                     if fc and isinstance(fc, dict):
-                        tool_name = fc.get("name", "unknown")
+                        tool_name = _intern(fc.get("name", "unknown"))
                         args = fc.get("args", {})
                         tc_type = EventType.BASH if tool_name in ("run_shell", "shell") else EventType.TOOL_CALL
                         session.events.append(
@@ -443,7 +757,7 @@ def _parse_gemini_jsonl(file_path: Path, session: Session, agent: Agent) -> None
                                 type=tc_type,
                                 agent_id="main",
                                 tool_name=tool_name,
-                                content=json.dumps(args)[:500] if args else tool_name,
+                                content=_json_snippet(args, 500) if args else tool_name,
                             )
                         )
 
@@ -469,41 +783,61 @@ def _parse_gemini_jsonl(file_path: Path, session: Session, agent: Agent) -> None
             continue
 
 
-def parse_claude_code(file_path: str | Path) -> Session:
-    """Parse a Claude Code JSONL transcript into a Session."""
+def parse_claude_code(
+    file_path: str | Path,
+    records: list[dict] | None = None,
+    token_state: tuple[set[str], set[str]] | None = None,
+) -> Session:
+    """Parse a Claude Code JSONL transcript into a Session.
+
+    Pass *records* to reuse the main transcript's lines already decoded
+    from *file_path*, and *token_state* to keep the main agent's token
+    bookkeeping for catching up on appended records later.
+    """
     file_path = Path(file_path)
     session = Session(id="unknown")
     main_agent = Agent(id="main", name="Main", color="cyan")
     session.agents["main"] = main_agent
     color_idx = 0
 
-    # Collect main session lines
-    lines = _read_jsonl(file_path)
+    # Process main session lines, picking up session metadata on the way
+    lines = records if records is not None else _read_jsonl(file_path)
+    meta: dict = {}
+    _process_lines(lines, "main", session, meta, token_state)
+    streams = [session.events]
+    if "id" in meta:
+        _apply_claude_meta(session, meta)
 
-    # Extract session ID from records for subagent lookup
-    session_id = file_path.stem
-    for rec in lines:
-        if "sessionId" in rec:
-            session_id = rec["sessionId"]
-            break
+    # Session ID (from the first record carrying one) for subagent lookup
+    session_id = meta.get("lookup_id", file_path.stem)
 
     # Discover sub-agent files (check both filename stem and session ID dirs)
     subagent_files: list[Path] = []
-    for candidate_dir in [
-        file_path.parent / file_path.stem / "subagents",
-        file_path.parent / session_id / "subagents",
-    ]:
-        if candidate_dir.is_dir():
-            subagent_files = sorted(candidate_dir.glob("agent-*.jsonl"))
-            break
+    for candidate_dir in _subagent_dirs(file_path, session_id):
+        # One directory listing; DirEntry carries name and type without a stat
+        try:
+            with os.scandir(candidate_dir) as it:
+                subagent_files = sorted(
+                    Path(e.path)
+                    for e in it
+                    if e.name.startswith("agent-") and e.name.endswith(".jsonl") and e.is_file()
+                )
+        except OSError:  # missing, not a directory, or unreadable
+            continue
+        break
+
+    # Read sub-agent transcripts concurrently — each is independent file I/O
+    if len(subagent_files) > 1:
+        with ThreadPoolExecutor(max_workers=min(8, len(subagent_files))) as ex:
+            sa_records = list(ex.map(_read_jsonl, subagent_files))
+    else:
+        sa_records = [_read_jsonl(f) for f in subagent_files]
 
-    # Parse sub-agent files to register agents and collect their events
-    subagent_events: list[tuple[str, list[dict]]] = []
-    for sa_file in subagent_files:
-        sa_lines = _read_jsonl(sa_file)
+    # Register each sub-agent and process its lines
+    for sa_file, sa_lines in zip(subagent_files, sa_records):
         if not sa_lines:
             continue
-        agent_id = sa_lines[0].get("agentId", sa_file.stem.replace("agent-", ""))
+        agent_id = _intern(sa_lines[0].get("agentId", sa_file.stem.replace("agent-", "")))
         short_id = agent_id[:7] if len(agent_id) > 7 else agent_id
         agent = Agent(
             id=agent_id,
@@ -513,113 +847,220 @@ def parse_claude_code(file_path: str | Path) -> Session:
         )
         color_idx += 1
         session.agents[agent_id] = agent
-        subagent_events.append((agent_id, sa_lines))
-
-    # Process main session lines
-    _process_lines(lines, "main", session)
-
-    # Process sub-agent lines
-    for agent_id, sa_lines in subagent_events:
+        session.events = []
         _process_lines(sa_lines, agent_id, session)
+        streams.append(session.events)
 
-    # Sort all events by timestamp
-    session.events.sort(key=lambda e: e.timestamp)
-
-    # Set session metadata from first meaningful record
-    for rec in lines:
-        if rec.get("type") in ("user", "assistant") and "sessionId" in rec:
-            session.id = rec.get("sessionId", session.id)
-            session.slug = rec.get("slug", "")
-            session.version = rec.get("version", "")
-            session.branch = rec.get("gitBranch", "")
-            session.start_time = rec.get("timestamp", "")
-            break
+    # Merge the per-agent streams into one timestamp-ordered list
+    session.events = _merge_streams(streams)
 
-    # Set agent spawn times
+    # Set agent spawn times from each agent's first event, stopping once all are found
+    missing_spawn = {aid for aid, a in session.agents.items() if not a.spawn_time}
     for event in session.events:
-        agent = session.agents.get(event.agent_id)
-        if agent and not agent.spawn_time:
-            agent.spawn_time = event.timestamp
+        if not missing_spawn:
+            break
+        if event.agent_id in missing_spawn:
+            missing_spawn.discard(event.agent_id)
+            session.agents[event.agent_id].spawn_time = event.timestamp
 
     return session
 
 
+def _apply_claude_meta(session: Session, meta: dict) -> None:
+    """Copy metadata collected by _process_lines onto the session."""
+    session.id = meta["id"]
+    session.slug = meta["slug"]
+    session.version = meta["version"]
+    session.branch = meta["branch"]
+    session.start_time = meta["start_time"]
+
+
+def _subagent_dirs(file_path: Path, session_id: str) -> list[Path]:
+    """Candidate sub-agent directories for a Claude transcript."""
+    return [
+        file_path.parent / file_path.stem / "subagents",
+        file_path.parent / session_id / "subagents",
+    ]
+
+
+def _has_subagent_dir(file_path: Path, session_id: str) -> bool:
+    return any(d.is_dir() for d in _subagent_dirs(file_path, session_id))
+
+
 MAX_JSONL_LINES = 50_000
+_READ_CHUNK = 1 << 20  # bytes per read; lines are split out of each chunk
 
 
 def _read_jsonl(path: Path) -> list[dict]:
     """Read a JSONL file, returning parsed records (capped at MAX_JSONL_LINES)."""
+    return _read_jsonl_from(path)[0]
+
+
+def _decode_line(line: bytes) -> dict | None:
+    """Decode one JSONL line; None for a blank line, ValueError if malformed."""
+    # Records start with "{" — only strip the odd indented or blank line.
+    # The decoder already tolerates a trailing "\r" from CRLF files.
+    if not line:
+        return None
+    if line[0] != 0x7B:
+        line = line.strip()
+        if not line:
+            return None
+    return _loads(line)
+
+
+def _read_jsonl_from(
+    path: Path, offset: int = 0, max_lines: int = MAX_JSONL_LINES
+) -> tuple[list[dict], int, int]:
+    """Read JSONL records starting at byte *offset*.
+
+    Returns ``(records, end, n_lines)``: *end* is the byte offset to resume
+    from next time and *n_lines* the number of newline-terminated lines
+    consumed, or -1 if the read was truncated at *max_lines*.  An
+    unterminated last line that does not decode is probably still being
+    written, so *end* stops before it.
+    """
     import logging
     _log = logging.getLogger(__name__)
     records = []
     bad_lines = 0
-    with open(path, encoding="utf-8") as f:
-        for line_num, line in enumerate(f, 1):
-            if line_num > MAX_JSONL_LINES:
-                _log.warning("Truncated %s at %d lines (max %d)", path.name, line_num - 1, MAX_JSONL_LINES)
+    n_lines = 0
+    end = offset
+    # Chunked reads split on newlines without per-line readline calls, and
+    # stop at the line cap instead of loading the rest of a huge file
+    with open(path, "rb") as f:
+        if offset:
+            f.seek(offset)
+        pending: list[bytes] = []  # pieces of a line not yet terminated
+        while n_lines >= 0:
+            chunk = f.read(_READ_CHUNK)
+            if not chunk:
                 break
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                records.append(json.loads(line))
-            except json.JSONDecodeError:
-                bad_lines += 1
-                _log.debug("Bad JSON at %s:%d", path.name, line_num)
+            pending.append(chunk)
+            if b"\n" not in chunk:
                 continue
+            lines = b"".join(pending).split(b"\n")
+            pending = [lines.pop()]
+            for line in lines:
+                if n_lines == max_lines:
+                    n_lines = -1
+                    break
+                n_lines += 1
+                end += len(line) + 1
+                try:
+                    rec = _decode_line(line)
+                except ValueError:  # JSONDecodeError, or bad UTF-8 with stdlib json
+                    bad_lines += 1
+                    _log.debug("Bad JSON at %s:%d", path.name, n_lines)
+                    continue
+                if rec is not None:
+                    records.append(rec)
+    last = b"".join(pending)
+    if n_lines == max_lines and last:
+        n_lines = -1
+    if n_lines < 0:
+        _log.warning("Truncated %s at byte %d (max %d lines)", path.name, end, MAX_JSONL_LINES)
+    elif last:
+        try:
+            rec = _decode_line(last)
+        except ValueError:
+            rec = None  # partial write — re-read it next time
+        else:
+            end += len(last)
+        if rec is not None:
+            records.append(rec)
     if bad_lines:
         _log.warning("Skipped %d malformed lines in %s", bad_lines, path.name)
-    return records
+    return records, end, n_lines
+
 
+def _process_lines(
+    lines: list[dict[str, Any]],
+    agent_id: str,
+    session: Session,
+    out_meta: dict[str, str] | None = None,
+    token_state: tuple[set[str], set[str]] | None = None,
+) -> None:
+    """Process JSONL records into events on the session.
 
-def _process_lines(lines: list[dict], agent_id: str, session: Session) -> None:
-    """Process JSONL records into events on the session."""
-    agent = session.agents.get(agent_id)
-    seen_request_ids: set[str] = set()  # Track to avoid double-counting agent tokens
-    request_tokens_assigned: set[str] = set()  # Track per-event token attribution
+    When *out_meta* is given it is filled in the same pass with
+    ``lookup_id`` (the first ``sessionId`` seen) and the session metadata
+    (``id``, ``slug``, ``version``, ``branch``, ``start_time``) from the
+    first user/assistant record that carries a ``sessionId``.
+
+    *token_state* carries the per-request token bookkeeping across calls,
+    so records appended to a transcript later are not double-counted.
+    """
+    agent_id = _intern(agent_id)
+    agent: Agent | None = session.agents.get(agent_id)
+    if token_state is None:
+        token_state = (set(), set())
+    # Track to avoid double-counting agent tokens, and per-event token attribution
+    seen_request_ids, request_tokens_assigned = token_state
+    meta_pending: bool = out_meta is not None
+    rec: dict[str, Any]
+    block: Any
+    timestamp: str
+    in_tok: int
+    out_tok: int
+    cache_tok: int
+    et_in: int
+    et_out: int
+    et_cache: int
+
+    # Hoist attribute lookups out of the per-record loop
+    append = session.events.append
+    extend = session.events.extend
+    tool_type_get = TOOL_TYPE_MAP.get
+    ET_USER = EventType.USER
+    ET_TEXT = EventType.TEXT
+    ET_THINK = EventType.THINK
+    ET_TOOL_RESULT = EventType.TOOL_RESULT
+    ET_ERROR = EventType.ERROR
+    ET_TOOL_CALL = EventType.TOOL_CALL
+    ET_SPAWN = EventType.SPAWN
+    # Events are built positionally — (timestamp, type, agent_id, tool_name,
+    # file_path, input_tokens, output_tokens, cache_read_tokens, content) —
+    # which skips keyword matching in the slotted dataclass __init__.
 
     for rec in lines:
         rec_type = rec.get("type")
         timestamp = rec.get("timestamp", "")
 
+        if meta_pending and "sessionId" in rec:
+            out_meta.setdefault("lookup_id", rec["sessionId"])
+            if rec_type in ("user", "assistant"):
+                out_meta["id"] = rec["sessionId"]
+                out_meta["slug"] = rec.get("slug", "")
+                out_meta["version"] = rec.get("version", "")
+                out_meta["branch"] = rec.get("gitBranch", "")
+                out_meta["start_time"] = timestamp
+                meta_pending = False
+
         if rec_type == "user":
             msg = rec.get("message", {})
             content = msg.get("content", "")
 
             # User text message
-            if isinstance(content, str) and content.strip():
-                session.events.append(
-                    Event(
-                        timestamp=timestamp,
-                        type=EventType.USER,
-                        agent_id=agent_id,
-                        content=content,
-                    )
-                )
+            if type(content) is str and content.strip():
+                append(Event(timestamp, ET_USER, agent_id, "", "", 0, 0, 0, content))
 
             # Tool results inside user messages
-            if isinstance(content, list):
+            elif type(content) is list:
                 for block in content:
-                    if not isinstance(block, dict):
+                    if type(block) is not dict:
                         continue
                     if block.get("type") == "tool_result":
                         result_text = block.get("content", "")
-                        if isinstance(result_text, list):
+                        if type(result_text) is list:
                             # Extract text from content blocks
                             parts = []
                             for rb in result_text:
-                                if isinstance(rb, dict) and rb.get("type") == "text":
+                                if type(rb) is dict and rb.get("type") == "text":
                                     parts.append(rb.get("text", ""))
                             result_text = "\n".join(parts)
-                        is_error = block.get("is_error", False)
-                        session.events.append(
-                            Event(
-                                timestamp=timestamp,
-                                type=EventType.ERROR if is_error else EventType.TOOL_RESULT,
-                                agent_id=agent_id,
-                                content=str(result_text),
-                            )
-                        )
+                        event_type = ET_ERROR if block.get("is_error", False) else ET_TOOL_RESULT
+                        append(Event(timestamp, event_type, agent_id, "", "", 0, 0, 0, str(result_text)))
 
         elif rec_type == "assistant":
             msg = rec.get("message", {})
@@ -640,64 +1081,52 @@ def _process_lines(lines: list[dict], agent_id: str, session: Session) -> None:
                     agent.output_tokens += out_tok
                     agent.cache_read_tokens += cache_tok
 
-            if not isinstance(content_blocks, list):
+            if type(content_blocks) is not list:
                 continue
 
-            def _event_tokens() -> tuple[int, int, int]:
-                """Return tokens for the first event per request, zero after."""
-                if request_id and request_id not in request_tokens_assigned:
-                    request_tokens_assigned.add(request_id)
-                    return in_tok, out_tok, cache_tok
-                return 0, 0, 0
+            # The first token-bearing event of a request carries its tokens
+            tokens_pending = bool(request_id) and request_id not in request_tokens_assigned
+            # Buffer this turn's events and add them to the session in one go
+            pending: list[Event] = []
 
             for block in content_blocks:
-                if not isinstance(block, dict):
+                if type(block) is not dict:
                     continue
                 block_type = block.get("type")
 
                 if block_type == "thinking":
                     thinking_text = block.get("thinking", "")
                     if thinking_text.strip():
-                        et_in, et_out, et_cache = _event_tokens()
-                        session.events.append(
-                            Event(
-                                timestamp=timestamp,
-                                type=EventType.THINK,
-                                agent_id=agent_id,
-                                content=thinking_text,
-                                input_tokens=et_in,
-                                output_tokens=et_out,
-                                cache_read_tokens=et_cache,
-                            )
+                        if tokens_pending:
+                            et_in, et_out, et_cache = in_tok, out_tok, cache_tok
+                            request_tokens_assigned.add(request_id)
+                            tokens_pending = False
+                        else:
+                            et_in = et_out = et_cache = 0
+                        pending.append(
+                            Event(timestamp, ET_THINK, agent_id, "", "", et_in, et_out, et_cache, thinking_text)
                         )
 
                 elif block_type == "text":
                     text = block.get("text", "").strip()
                     if text:
-                        session.events.append(
-                            Event(
-                                timestamp=timestamp,
-                                type=EventType.TEXT,
-                                agent_id=agent_id,
-                                content=text,
-                            )
-                        )
+                        pending.append(Event(timestamp, ET_TEXT, agent_id, "", "", 0, 0, 0, text))
 
                 elif block_type == "tool_use":
-                    tool_name = block.get("name", "unknown")
+                    tool_name = _intern(block.get("name", "unknown"))
                     tool_input = block.get("input", {})
-                    event_type = TOOL_TYPE_MAP.get(tool_name, EventType.TOOL_CALL)
+                    event_type = tool_type_get(tool_name, ET_TOOL_CALL)
 
                     file_path = ""
                     description = ""
 
                     if tool_name in ("Read", "Write", "Edit"):
-                        file_path = tool_input.get("file_path", "")
+                        file_path = _intern(tool_input.get("file_path", ""))
                     elif tool_name == "Bash":
                         description = tool_input.get("description", "") or tool_input.get("command", "")
                     elif tool_name == "Task":
                         description = tool_input.get("description", "")
-                        event_type = EventType.SPAWN
+                        event_type = ET_SPAWN
                     elif tool_name in ("Glob", "Grep"):
                         description = tool_input.get("pattern", "")
                     elif tool_name == "WebSearch":
@@ -708,18 +1137,19 @@ def _process_lines(lines: list[dict], agent_id: str, session: Session) -> None:
                         description = str(tool_input)
 
                     content = description or file_path
-                    et_in, et_out, et_cache = _event_tokens()
+                    if tokens_pending:
+                        et_in, et_out, et_cache = in_tok, out_tok, cache_tok
+                        request_tokens_assigned.add(request_id)
+                        tokens_pending = False
+                    else:
+                        et_in = et_out = et_cache = 0
 
-                    session.events.append(
+                    pending.append(
                         Event(
-                            timestamp=timestamp,
-                            type=event_type,
-                            agent_id=agent_id,
-                            tool_name=tool_name,
-                            file_path=file_path,
-                            content=content,
-                            input_tokens=et_in,
-                            output_tokens=et_out,
-                            cache_read_tokens=et_cache,
+                            timestamp, event_type, agent_id, tool_name, file_path,
+                            et_in, et_out, et_cache, content,
                         )
                     )
+
+            if pending:
+                extend(pending)
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import json
+import operator
 import time
 from pathlib import Path
 from typing import List, Tuple
@@ -12,10 +13,17 @@ from .models import SessionSummary
 # File modified within this many seconds is considered active
 ACTIVE_THRESHOLD = 60
 
+# Sort key: active sessions first, then most recently modified
+_recency_key = operator.attrgetter("is_active", "last_modified")
+
 # TTL cache for scan_sessions: (result, timestamp)
 _scan_cache: dict[str, Tuple[List[SessionSummary], float]] = {}
 _SCAN_TTL = 5.0  # seconds
 
+# Lookup index for the most recent scan result: (summaries, {id/path: summary}).
+# Rebuilt only when scan_sessions hands back a new list.
+_scan_index: tuple[list[SessionSummary] | None, dict[str, SessionSummary]] = (None, {})
+
 # Default directories to scan for each agent tool.
 # Each tuple is (directory_path, source_label, file_glob_patterns).
 _DEFAULT_SOURCES: list[tuple[Path, str, list[str]]] = [
@@ -56,11 +64,30 @@ def scan_sessions(base_dir: Path | None = None) -> list[SessionSummary]:
             summaries.extend(_scan_single_dir(dir_path, source=source, _skip_cache=True))
 
     # Sort by recency, active first
-    summaries.sort(key=lambda s: (s.is_active, s.last_modified), reverse=True)
+    summaries.sort(key=_recency_key, reverse=True)
     _scan_cache[cache_key] = (summaries, time.time())
     return summaries
 
 
+def session_index(summaries: list[SessionSummary]) -> dict[str, SessionSummary]:
+    """Map session IDs and file paths to summaries for *summaries*.
+
+    The index is built once per scan result, so repeated lookups within the
+    scan TTL are dict hits instead of a walk over every summary.
+    """
+    global _scan_index
+    cached_for, index = _scan_index
+    if cached_for is not summaries:
+        index = {}
+        # Insert in reverse so the first matching summary wins, as a
+        # front-to-back search would.
+        for s in reversed(summaries):
+            index[s.file_path] = s
+            index[s.id] = s
+        _scan_index = (summaries, index)
+    return index
+
+
 def _scan_single_dir(
     base_dir: Path,
     source: str = "claude",
@@ -112,7 +139,7 @@ def _scan_single_dir(
             continue
 
     # Sort by recency, active first
-    summaries.sort(key=lambda s: (s.is_active, s.last_modified), reverse=True)
+    summaries.sort(key=_recency_key, reverse=True)
     if not _skip_cache:
         _scan_cache[cache_key] = (summaries, time.time())
     return summaries
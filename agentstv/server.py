@@ -4,14 +4,22 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import dataclasses
 import hashlib
+import heapq
+import importlib.util
+import itertools
 import logging
+import math
+import operator
 import os
 import random
 import re
+import string
 import sys
 import time
 import webbrowser
+from collections import Counter, deque
 from contextlib import asynccontextmanager
 from pathlib import Path
 from urllib.parse import urlparse
@@ -22,8 +30,19 @@ from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from . import __version__, llm
+from .models import Event, Session, SessionSummary
 from .parser import parse
-from .scanner import scan_sessions, _DEFAULT_SOURCES
+from .scanner import scan_sessions, session_index, _DEFAULT_SOURCES
+
+try:
+    from watchfiles import awatch
+except ImportError:  # optional — WebSocket loops fall back to polling
+    awatch = None
+
+try:
+    import orjson
+except ImportError:  # optional speedup — stdlib json works fine
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -36,21 +55,77 @@ DATA_DIR: Path | None = Path(_data_dir_env) if _data_dir_env else None
 
 @asynccontextmanager
 async def _lifespan(app: FastAPI):
+    warmup_task = asyncio.create_task(llm.warmup())
     yield
+    warmup_task.cancel()
     await llm.shutdown_clients()
 
 
-app = FastAPI(title="agentstv", lifespan=_lifespan)
+# Server-wide scan result shared by every endpoint and WebSocket: (expiry, summaries).
+# The lock makes concurrent callers on a miss wait for one scan instead of
+# each walking the session directories.
+_SCAN_CACHE_TTL = 1.0  # seconds
+_scan_result: tuple[float, list[SessionSummary]] = (0.0, [])
+_scan_lock = asyncio.Lock()
+
+
+async def _scan_sessions_cached() -> list[SessionSummary]:
+    """Return scan_sessions(DATA_DIR), memoized for _SCAN_CACHE_TTL seconds."""
+    global _scan_result
+    if time.monotonic() < _scan_result[0]:
+        return _scan_result[1]
+    async with _scan_lock:
+        expiry, summaries = _scan_result
+        if time.monotonic() < expiry:
+            return summaries
+        summaries = await asyncio.to_thread(scan_sessions, DATA_DIR)
+        _scan_result = (time.monotonic() + _SCAN_CACHE_TTL, summaries)
+        return summaries
+
+
+class _ORJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson (several times faster on big payloads)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+_JSONResponse = _ORJSONResponse if orjson is not None else JSONResponse
+
+
+async def _send_json(websocket: WebSocket, payload: dict) -> None:
+    """Send *payload* as a JSON text frame, encoded with orjson when available."""
+    if orjson is not None:
+        await websocket.send_text(orjson.dumps(payload).decode())
+    else:
+        await websocket.send_json(payload)
+
+
+app = FastAPI(title="agentstv", lifespan=_lifespan, default_response_class=_JSONResponse)
 
 # Public mode — redacts sensitive content before sending to clients
 PUBLIC_MODE = False
 
 # Map hashed file paths back to real paths (for public mode routing)
 _path_map: dict[str, str] = {}
+# Real path -> public hash; paths are stable, so each is hashed once
+_path_hash_cache: dict[str, str] = {}
 
 # Maximum length for user chat messages
 MAX_MESSAGE_LENGTH = 2000
 
+# Most recent events returned by /api/master
+_MASTER_EVENT_LIMIT = 2000
+
+# Sort key for serialized event dicts
+_event_ts = operator.itemgetter("timestamp")
+
+
+def _tagged_event_order(pair: tuple[Event, str]) -> int:
+    """Merge key for (event, project) pairs; ts_ns is filled in by the parser."""
+    return pair[0].ts_ns
+
+
 # Simple in-memory rate limiter
 _rate_limits: dict[str, list[float]] = {}
 _RATE_LIMIT_WINDOW = 60  # seconds
@@ -81,41 +156,113 @@ def _check_rate_limit(client_ip: str) -> bool:
             del _rate_limits[k]
     return True
 
-# Patterns that look like secrets
+# Patterns that look like secrets.  The keyword alternatives are factored
+# on their leading letters (api_key/apikey/access_token/... under "a") so
+# the regex engine branches once per position instead of trying each
+# keyword in turn — the same matches, with much less backtracking.
 _SECRET_PATTERNS = re.compile(
     r'(?i)'
     r'(?:'
-    r'(?:api[_-]?key|apikey|secret[_-]?key|access[_-]?token|auth[_-]?token'
-    r'|password|passwd|pwd|bearer|authorization|private[_-]?key'
-    r'|client[_-]?secret|refresh[_-]?token|session[_-]?token'
-    r'|database[_-]?url|connection[_-]?string|dsn'
-    r'|aws[_-]?secret|stripe[_-]?sk|sk[_-]live|sk[_-]test'
+    r'(?:a(?:pi[_-]?key|pikey|ccess[_-]?token|uth(?:[_-]?token|orization)|ws[_-]?secret)'
+    r'|s(?:ecret[_-]?key|ession[_-]?token|tripe[_-]?sk|k[_-](?:live|test))'
+    r'|p(?:ass(?:word|wd)|wd|rivate[_-]?key)'
+    r'|c(?:lient[_-]?secret|onnection[_-]?string)'
+    r'|d(?:atabase[_-]?url|sn)'
+    r'|bearer|refresh[_-]?token'
     r')\s*[=:]\s*\S+'
-    r'|(?:ghp_|gho_|github_pat_|xox[bpsar]-|slack_|AKIA)[A-Za-z0-9_-]{10,}'
-    r'|[A-Za-z0-9+/]{40,}'  # long base64-ish strings
+    r'|(?:g(?:h[po]_|ithub_pat_)|xox[bpsar]-|slack_|AKIA)[A-Za-z0-9_-]{10,}'
     r'|eyJ[A-Za-z0-9_-]{20,}'  # JWT tokens
     r')'
 )
 
+# Cheap prefilter: every secret pattern above contains one of these literals
+# (matched case-insensitively).  Most event text has none and skips the full
+# secret regex.
+_SECRET_HINTS = re.compile(
+    r'key|token|secret|passw|pwd|bearer|authorization|database|connection|dsn'
+    r'|stripe|sk[_-]|gh[po]_|github_pat_|xox|slack_|akia|eyj',
+    re.IGNORECASE,
+)
+
+# Long unlabelled tokens are only treated as secrets when they look random.
+# Candidates stop at "/" and "." so URL and path segments are judged on their
+# own (paths are shortened before this pass anyway); only a 40+ char run is
+# taken whole across "/", as standard base64 keys contain it.
+#  - hex with letters and digits (keys, digests): above _HEX_ENTROPY_THRESHOLD
+#    (hex tops out at 4 bits/char)
+#  - anything else must mix at least two of upper/lower/digit, reach a
+#    fraction of log2(len) bits/char (capped at _MAX_ENTROPY_THRESHOLD), and
+#    switch character class at least _MIN_CLASS_SWITCH_RATIO of the time.
+#    Random base64 switches on ~65% of characters; identifiers, branch names
+#    and env vars are runs of words and stay near 25-40%.
+_TOKEN_CANDIDATE = re.compile(r'[A-Za-z0-9+/]{40,}=*|[A-Za-z0-9+_-]{20,}')
+_HEX_TOKEN = re.compile(r'(?=.*[0-9])(?=.*[a-fA-F])[0-9a-fA-F]+')
+_HEX_ENTROPY_THRESHOLD = 3.0  # bits per character
+_LENGTH_ENTROPY_FACTOR = 0.8  # of log2(len)
+_MAX_ENTROPY_THRESHOLD = 4.5  # bits per character
+_MIN_CLASS_SWITCH_RATIO = 0.45
+# Character class per token char: lower, upper, digit, other
+_CHAR_CLASS = str.maketrans(
+    string.ascii_lowercase + string.ascii_uppercase + string.digits + '+/_-=',
+    'l' * 26 + 'u' * 26 + 'd' * 10 + 'ooooo',
+)
+
 # Full paths patterns (Windows and Unix)
 _PATH_PATTERN = re.compile(
     r'(?:[A-Z]:\\|/(?:home|Users|mnt|var|etc|opt|tmp)/)\S+'
 )
 
 
+# Bound once — skips the attribute lookup on every redaction
+_secret_sub = _SECRET_PATTERNS.sub
+_token_sub = _TOKEN_CANDIDATE.sub
+_path_sub = _PATH_PATTERN.sub
+
+
+def _path_to_name(m: re.Match) -> str:
+    """Replace a full path match with just its filename."""
+    # String splitting instead of Path(p).name: no Path object per match, and
+    # Windows separators are split the same way on every platform
+    p = m.group(0).rstrip('",\'`;:)]}>/\\')
+    return '…/' + p.rpartition('/')[2].rpartition('\\')[2]
+
+
+def _shannon_entropy(s: str) -> float:
+    """Shannon entropy of *s* in bits per character."""
+    n = len(s)
+    return -sum(c / n * math.log2(c / n) for c in Counter(s).values())
+
+
+def _looks_random(token: str) -> bool:
+    """True if *token* looks like key material rather than words or an identifier."""
+    if _HEX_TOKEN.fullmatch(token):
+        return _shannon_entropy(token) > _HEX_ENTROPY_THRESHOLD
+    classes = token.translate(_CHAR_CLASS)
+    if sum(c in classes for c in 'lud') < 2:
+        return False
+    switches = sum(a != b for a, b in zip(classes, classes[1:]))
+    if switches < _MIN_CLASS_SWITCH_RATIO * (len(token) - 1):
+        return False
+    threshold = min(_LENGTH_ENTROPY_FACTOR * math.log2(len(token)), _MAX_ENTROPY_THRESHOLD)
+    return _shannon_entropy(token) > threshold
+
+
+def _redact_random_token(m: re.Match) -> str:
+    """Redact a long token match only if it looks like random key material."""
+    token = m.group(0)
+    return '[REDACTED]' if _looks_random(token) else token
+
+
 def _redact_text(text: str) -> str:
     """Redact secrets and full paths from text."""
     if not text:
         return text
-    # Redact secret-like patterns
-    text = _SECRET_PATTERNS.sub('[REDACTED]', text)
+    # Redact secret-like patterns, if the prefilter finds anything to look at
+    if _SECRET_HINTS.search(text):
+        text = _secret_sub('[REDACTED]', text)
     # Redact full file paths, keep just the filename
-    def _path_to_name(m: re.Match) -> str:
-        p = m.group(0).rstrip('",\'`;:)]}>').rstrip()
-        name = Path(p).name
-        return f'…/{name}'
-    text = _PATH_PATTERN.sub(_path_to_name, text)
-    return text
+    text = _path_sub(_path_to_name, text)
+    return _token_sub(_redact_random_token, text)
 
 
 def _redact_event(evt: dict) -> dict:
@@ -132,12 +279,26 @@ def _redact_event(evt: dict) -> dict:
     return evt
 
 
-def _redact_session(data: dict) -> dict:
-    """Redact a full session dict."""
+def _event_dict(evt: Event) -> dict:
+    """Client-facing dict for *evt*, redacted in public mode.
+
+    Events don't change once parsed, so the redacted form is computed once and
+    cached on the event; callers get their own shallow copy to annotate.
+    """
     if not PUBLIC_MODE:
-        return data
-    data = dict(data)
-    data['events'] = [_redact_event(e) for e in data.get('events', [])]
+        return evt.to_dict()
+    redacted = evt.public_dict
+    if redacted is None:
+        redacted = evt.public_dict = _redact_event(evt.to_dict())
+    return dict(redacted)
+
+
+def _session_dict(session: Session) -> dict:
+    """Client-facing dict for a full session, redacted in public mode."""
+    if not PUBLIC_MODE:
+        return session.to_dict()
+    data = dataclasses.replace(session, events=[]).to_dict()
+    data['events'] = [_event_dict(e) for e in session.events]
     return data
 
 
@@ -147,9 +308,13 @@ def _redact_summary(s: dict) -> dict:
         return s
     s = dict(s)
     # Replace file path with hash, store mapping for lookups
-    if s.get('file_path'):
-        hashed = hashlib.md5(s['file_path'].encode()).hexdigest()[:12]
-        _path_map[hashed] = s['file_path']
+    fp = s.get('file_path')
+    if fp:
+        hashed = _path_hash_cache.get(fp)
+        if hashed is None:
+            hashed = hashlib.blake2b(fp.encode(), digest_size=6).hexdigest()
+            _path_hash_cache[fp] = hashed
+            _path_map[hashed] = fp
         s['file_path'] = hashed
     return s
 
@@ -164,14 +329,18 @@ async def _resolve_session_path(session_id: str) -> Path | None:
     real_path = _path_map.get(session_id, session_id)
     file_path = Path(real_path)
 
-    if not file_path.exists():
+    if not await asyncio.to_thread(file_path.exists):
         # Try finding by session ID in known locations
-        summaries = await asyncio.to_thread(scan_sessions, DATA_DIR)
-        for s in summaries:
-            if s.id == session_id or s.file_path == session_id:
-                file_path = Path(s.file_path)
-                break
+        s = session_index(await _scan_sessions_cached()).get(session_id)
+        if s is not None:
+            file_path = Path(s.file_path)
+
+    # exists()/resolve() hit the filesystem — keep them off the event loop
+    return await asyncio.to_thread(_validate_session_path, file_path)
 
+
+def _validate_session_path(file_path: Path) -> Path | None:
+    """Return *file_path* if it exists under an allowed directory, else None."""
     if not file_path.exists():
         return None
 
@@ -254,12 +423,11 @@ async def post_chat(request: Request):
             file_path = await _resolve_session_path(session_id)
             if file_path:
                 session = await asyncio.to_thread(parse, file_path)
-                session_data = _redact_session(session.to_dict())
-                context = _build_context(session_data, n=8)
+                context = _build_context(_session_tail(session, 8), n=8)
                 # Extract specific event if replying to one
-                events = session_data.get("events", [])
+                events = session.events
                 if reply_to_index is not None and 0 <= reply_to_index < len(events):
-                    target = events[reply_to_index]
+                    target = _event_dict(events[reply_to_index])
                     event_content = target.get("content", "")
                     event_type = target.get("type", "")
         except Exception:
@@ -322,8 +490,8 @@ async def put_settings(request: Request):
 
 @app.get("/api/sessions")
 async def list_sessions():
-    summaries = await asyncio.to_thread(scan_sessions, DATA_DIR)
-    return [_redact_summary(s.to_dict()) for s in summaries]
+    summaries = await _scan_sessions_cached()
+    return _JSONResponse([_redact_summary(s.to_dict()) for s in summaries])
 
 
 @app.get("/api/session-preview/{session_id:path}")
@@ -335,7 +503,7 @@ async def get_session_preview(session_id: str):
     try:
         session = await asyncio.to_thread(parse, file_path)
         for evt in reversed(session.events):
-            d = _redact_event(evt.to_dict())
+            d = _event_dict(evt)
             if d.get("content") and len(d["content"]) > 10:
                 return {"content": d["content"], "type": d.get("type", "")}
     except Exception:
@@ -350,7 +518,7 @@ async def get_session(session_id: str):
     if not file_path:
         return JSONResponse({"error": "Session not found"}, status_code=404)
     session = await asyncio.to_thread(parse, file_path)
-    return _redact_session(session.to_dict())
+    return _JSONResponse(_session_dict(session))
 
 
 # Buffer of pre-generated viewer chat messages per session
@@ -370,6 +538,15 @@ VIEWER_NAMES = [
 ]
 
 
+def _session_tail(session: Session, n: int) -> dict:
+    """Return a redacted session-shaped dict holding only the last N events.
+
+    Context building only looks at the tail, so this avoids converting
+    every event of a long session to a dict.
+    """
+    return {"events": [_event_dict(e) for e in session.events[-n:]]}
+
+
 def _build_context(session_data: dict, n: int = 5) -> str:
     """Build a context string from the last N events of a session.
 
@@ -443,15 +620,13 @@ async def viewer_chat(session_id: str):
     try:
         context = None
         if session_id == "__master__":
-            master_data = await get_master()
+            master_data = await _master_data()
             context = _build_context(master_data, n=10)
         else:
             file_path = await _resolve_session_path(session_id)
             if file_path:
                 session = await asyncio.to_thread(parse, file_path)
-                context = _build_context(
-                    _redact_session(session.to_dict())
-                )
+                context = _build_context(_session_tail(session, 5))
 
         if context:
             messages, llm_error = await llm.generate_viewer_messages(
@@ -536,9 +711,7 @@ async def narrator_chat(session_id: str):
         file_path = await _resolve_session_path(session_id)
         if file_path:
             session = await asyncio.to_thread(parse, file_path)
-            context = _build_context(
-                _redact_session(session.to_dict()), n=10
-            )
+            context = _build_context(_session_tail(session, 10), n=10)
             messages = await llm.generate_narrator_messages(context, count=3)
             if messages:
                 buf = list(messages)
@@ -564,55 +737,87 @@ _WS_HEARTBEAT_INTERVAL = 30  # seconds
 
 @app.websocket("/ws/session/{session_id:path}")
 async def ws_session(websocket: WebSocket, session_id: str):
-    """Live updates for a single session — polls file every 2s, sends deltas."""
+    """Live updates for a single session — wakes on file changes, sends deltas."""
     await websocket.accept()
 
     file_path = await _resolve_session_path(session_id)
     if not file_path:
-        await websocket.send_json({"error": "Session not found"})
+        await _send_json(websocket, {"error": "Session not found"})
         await websocket.close()
         return
 
     # Send initial full state
     session = await asyncio.to_thread(parse, file_path)
-    data = _redact_session(session.to_dict())
-    await websocket.send_json({"type": "full", "data": data})
+    data = _session_dict(session)
+    await _send_json(websocket, {"type": "full", "data": data})
     last_count = len(session.events)
+    # Agent dicts as the client last saw them; deltas only carry changes
+    sent_agents = data["agents"]
     last_hash = _file_hash(file_path)
     last_ping = time.time()
+    name = file_path.name
 
     try:
-        while True:
-            await asyncio.sleep(2)
+        async for _ in _watch(
+            [file_path.parent], 2, watch_filter=lambda _c, p: os.path.basename(p) == name, recursive=False
+        ):
             # Heartbeat
             now = time.time()
             if now - last_ping >= _WS_HEARTBEAT_INTERVAL:
-                await websocket.send_json({"type": "ping"})
+                await _send_json(websocket, {"type": "ping"})
                 last_ping = now
             current_hash = _file_hash(file_path)
             if current_hash != last_hash:
                 last_hash = current_hash
                 session = await asyncio.to_thread(parse, file_path)
-                if len(session.events) > last_count:
-                    new_events = [_redact_event(e.to_dict()) for e in session.events[last_count:]]
-                    agents = {k: v.to_dict() for k, v in session.agents.items()}
-                    await websocket.send_json({
+                # Take the count first: it is what this delta covers
+                new_count = len(session.events)
+                if new_count > last_count:
+                    new_events = [_event_dict(e) for e in session.events[last_count:new_count]]
+                    agents = {}
+                    for k, v in session.agents.items():
+                        ad = v.to_dict()
+                        if sent_agents.get(k) != ad:
+                            sent_agents[k] = agents[k] = ad
+                    await _send_json(websocket, {
                         "type": "delta",
                         "events": new_events,
                         "agents": agents,
-                        "total_events": len(session.events),
+                        "total_events": new_count,
                     })
-                    last_count = len(session.events)
+                    last_count = new_count
     except WebSocketDisconnect:
         pass
     except Exception:
         logger.exception("WebSocket error for session %s", session_id)
 
 
+# Parses of different sessions run in worker threads side by side; the
+# semaphore caps how many hit the disk at once
+_PARSE_CONCURRENCY = 8
+_parse_slots = asyncio.Semaphore(_PARSE_CONCURRENCY)
+
+
+async def _parse_in_thread(file_path: str) -> Session:
+    """parse() in a worker thread, once a parse slot is free."""
+    async with _parse_slots:
+        return await asyncio.to_thread(parse, Path(file_path))
+
+
+async def _parse_all(file_paths) -> list[Session | BaseException]:
+    """Parse several transcripts concurrently; failures are returned, not raised."""
+    return await asyncio.gather(*(_parse_in_thread(fp) for fp in file_paths), return_exceptions=True)
+
+
 @app.get("/api/master")
 async def get_master():
     """Return merged events from all recent sessions for the master channel."""
-    summaries = await asyncio.to_thread(scan_sessions, DATA_DIR)
+    return _JSONResponse(await _master_data())
+
+
+async def _master_data() -> dict:
+    """Merged events, agents and summaries of the most recent session per project."""
+    summaries = await _scan_sessions_cached()
     # Take the most recent session per project (top 20)
     seen_projects: set[str] = set()
     selected: list[dict] = []
@@ -624,34 +829,37 @@ async def get_master():
         if len(selected) >= 20:
             break
 
-    # Parse each and merge events with project tags
-    all_events = []
+    # Parse each; events are merged with project tags below
+    streams = []
     all_agents = {}
     # Need original file_paths before redaction for parsing
     original_paths = {s["project_name"]: s["file_path"] for s in selected}
-    selected = [_redact_summary(s) for s in selected]
+    if PUBLIC_MODE:
+        selected = [_redact_summary(s) for s in selected]
 
-    for proj, fpath in original_paths.items():
-        try:
-            session = await asyncio.to_thread(parse, Path(fpath))
-            for evt in session.events:
-                d = _redact_event(evt.to_dict())
-                d["project"] = proj
-                all_events.append(d)
-            for aid, agent in session.agents.items():
-                key = f"{proj}:{aid}"
-                ad = agent.to_dict()
-                ad["project"] = proj
-                ad["id"] = key
-                ad["name"] = f"{proj}/{agent.name}"
-                all_agents[key] = ad
-        except Exception:
-            logger.exception("Failed to parse session for project %s", proj)
+    parsed = await _parse_all(original_paths.values())
+    for proj, session in zip(original_paths, parsed):
+        if isinstance(session, BaseException):
+            logger.error("Failed to parse session for project %s", proj, exc_info=session)
             continue
-
-    # Sort by timestamp, keep last 2000
-    all_events.sort(key=lambda e: e["timestamp"])
-    all_events = all_events[-2000:]
+        streams.append(zip(session.events, itertools.repeat(proj)))
+        for aid, agent in session.agents.items():
+            key = f"{proj}:{aid}"
+            ad = agent.to_dict()
+            ad["project"] = proj
+            ad["id"] = key
+            ad["name"] = f"{proj}/{agent.name}"
+            all_agents[key] = ad
+
+    # Each session's events are already time-ordered by the parser, so a
+    # k-way merge replaces sorting everything.  The bounded deque keeps only
+    # the newest events as they stream past; just those become dicts.
+    latest = deque(heapq.merge(*streams, key=_tagged_event_order), maxlen=_MASTER_EVENT_LIMIT)
+    all_events = []
+    for evt, proj in latest:
+        d = _event_dict(evt)
+        d["project"] = proj
+        all_events.append(d)
 
     return {
         "events": all_events,
@@ -661,100 +869,255 @@ async def get_master():
     }
 
 
-@app.websocket("/ws/master")
-async def ws_master(websocket: WebSocket):
-    """Live updates for master channel — polls all active sessions every 3s."""
-    await websocket.accept()
-    last_event_counts: dict[str, int] = {}
-    last_ping = time.time()
+# Messages buffered per feed subscriber before a slow client is dropped
+_FEED_QUEUE_SIZE = 64
 
-    try:
-        while True:
-            now = time.time()
-            if now - last_ping >= _WS_HEARTBEAT_INTERVAL:
-                await websocket.send_json({"type": "ping"})
-                last_ping = now
 
-            summaries = await asyncio.to_thread(scan_sessions, DATA_DIR)
-            active = [s for s in summaries if s.is_active]
-            new_events = []
-            all_agents = {}
+class _Broadcaster:
+    """One background poller fanned out to every subscribed WebSocket.
+
+    *step* is awaited each time a transcript changes (and at least every
+    *refresh_interval* seconds) and returns ``(snapshot, message)``:
+    *message* (if any) is queued for every current subscriber and
+    *snapshot* is what a newly connected client starts from.
+    The task runs only while someone is subscribed, so per-connection cost is
+    a queue instead of its own scan-and-parse loop.  Queues are bounded: a
+    subscriber that falls _FEED_QUEUE_SIZE messages behind is dropped and
+    receives None in place of its backlog.
+    """
 
-            for s in active:
+    def __init__(
+        self, name: str, step, poll_interval: float, refresh_interval: float = _WS_HEARTBEAT_INTERVAL
+    ):
+        self.name = name
+        self._step = step
+        self._poll_interval = poll_interval
+        self._refresh_interval = refresh_interval
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self._snapshot: dict | None = None
+        self._state: dict = {}
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_FEED_QUEUE_SIZE)
+        if self._snapshot is not None:
+            queue.put_nowait(self._snapshot)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._snapshot = None
+            self._state = {}
+
+    def _publish(self, message: dict) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A client this far behind can't be caught up with deltas;
+                # drop it, and it reconnects to start from a fresh snapshot
+                logger.warning("Dropping slow %s subscriber", self.name)
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _run(self) -> None:
+        changes = _watch(
+            _session_roots(),
+            self._poll_interval,
+            watch_filter=_is_transcript,
+            idle_timeout=self._refresh_interval,
+        )
+        try:
+            while True:
                 try:
-                    session = await asyncio.to_thread(parse, Path(s.file_path))
-                    proj = s.project_name
-                    prev_count = last_event_counts.get(s.file_path, 0)
-
-                    if prev_count == 0:
-                        start = max(0, len(session.events) - 20)
-                    else:
-                        start = prev_count
-
-                    for evt in session.events[start:]:
-                        d = _redact_event(evt.to_dict())
-                        d["project"] = proj
-                        new_events.append(d)
-
-                    last_event_counts[s.file_path] = len(session.events)
-
-                    for aid, agent in session.agents.items():
-                        key = f"{proj}:{aid}"
-                        ad = agent.to_dict()
-                        ad["project"] = proj
-                        ad["id"] = key
-                        ad["name"] = f"{proj}/{agent.name}"
-                        all_agents[key] = ad
+                    self._snapshot, message = await self._step(self._state)
                 except Exception:
-                    logger.exception("Failed to parse active session %s", s.file_path)
-                    continue
-
-            if new_events:
-                new_events.sort(key=lambda e: e["timestamp"])
-                await websocket.send_json({
-                    "type": "delta",
-                    "events": new_events,
-                    "agents": all_agents,
-                    "active_count": len(active),
-                })
-
-            await asyncio.sleep(3)
-    except WebSocketDisconnect:
-        pass
-    except Exception:
-        logger.exception("WebSocket error in master channel")
+                    logger.exception("Failed to refresh %s feed", self.name)
+                else:
+                    if message is not None:
+                        self._publish(message)
+                await anext(changes)
+        finally:
+            await changes.aclose()
 
 
-@app.websocket("/ws/dashboard")
-async def ws_dashboard(websocket: WebSocket):
-    """Live updates for the dashboard — polls session list every 10s."""
+async def _serve_feed(websocket: WebSocket, feed: _Broadcaster) -> None:
+    """Relay *feed* to one client, pinging when it has been quiet."""
     await websocket.accept()
-    last_ping = time.time()
+    queue = feed.subscribe()
     try:
         while True:
-            now = time.time()
-            if now - last_ping >= _WS_HEARTBEAT_INTERVAL:
-                await websocket.send_json({"type": "ping"})
-                last_ping = now
-            summaries = await asyncio.to_thread(scan_sessions, DATA_DIR)
-            await websocket.send_json({
-                "type": "sessions",
-                "data": [_redact_summary(s.to_dict()) for s in summaries],
-            })
-            await asyncio.sleep(10)
+            try:
+                message = await asyncio.wait_for(queue.get(), _WS_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                message = {"type": "ping"}
+            if message is None:  # dropped for falling behind
+                await websocket.close(code=1013)
+                break
+            await _send_json(websocket, message)
     except WebSocketDisconnect:
         pass
     except Exception:
-        logger.exception("WebSocket error in dashboard")
+        logger.exception("WebSocket error in %s", feed.name)
+    finally:
+        feed.unsubscribe(queue)
+
+
+async def _master_step(state: dict) -> tuple[dict | None, dict | None]:
+    """Re-read active sessions; return the recent-events snapshot and the delta."""
+    last_event_counts: dict[str, int] = state.setdefault("counts", {})
+    # Agent dicts as last broadcast; only agents that differ go in a delta
+    sent_agents: dict[str, dict] = state.setdefault("agents", {})
+    summaries = await _scan_sessions_cached()
+    active = [s for s in summaries if s.is_active]
+    new_events = []
+    recent_events = []
+    all_agents = {}
+    changed_agents = {}
+
+    parsed = await _parse_all(s.file_path for s in active)
+    for s, session in zip(active, parsed):
+        if isinstance(session, BaseException):
+            logger.error("Failed to parse active session %s", s.file_path, exc_info=session)
+            continue
+        try:
+            proj = s.project_name
+            prev_count = last_event_counts.get(s.file_path, 0)
+            new_count = len(session.events)
+            recent_start = max(0, new_count - 20)
+            start = prev_count if prev_count else recent_start
+            first = min(start, recent_start)
+
+            for i, evt in enumerate(session.events[first:new_count], first):
+                d = _event_dict(evt)
+                d["project"] = proj
+                if i >= start:
+                    new_events.append(d)
+                if i >= recent_start:
+                    recent_events.append(d)
 
+            last_event_counts[s.file_path] = new_count
 
-def _file_hash(path: Path) -> str:
-    """Quick hash of file size + mtime for change detection."""
+            for aid, agent in session.agents.items():
+                key = f"{proj}:{aid}"
+                ad = agent.to_dict()
+                ad["project"] = proj
+                ad["id"] = key
+                ad["name"] = f"{proj}/{agent.name}"
+                all_agents[key] = ad
+                if sent_agents.get(key) != ad:
+                    sent_agents[key] = changed_agents[key] = ad
+        except Exception:
+            logger.exception("Failed to parse active session %s", s.file_path)
+            continue
+
+    snapshot = None
+    if recent_events:
+        recent_events.sort(key=_event_ts)
+        snapshot = {
+            "type": "delta",
+            "events": recent_events,
+            "agents": all_agents,
+            "active_count": len(active),
+        }
+    if not new_events and not changed_agents:
+        return snapshot, None
+    new_events.sort(key=_event_ts)
+    return snapshot, {
+        "type": "delta",
+        "events": new_events,
+        "agents": changed_agents,
+        "active_count": len(active),
+    }
+
+
+async def _dashboard_step(state: dict) -> tuple[dict, dict]:
+    """Rescan sessions; the full list is both the snapshot and the update."""
+    summaries = await _scan_sessions_cached()
+    message = {
+        "type": "sessions",
+        "data": [_redact_summary(s.to_dict()) for s in summaries],
+    }
+    return message, message
+
+
+_master_feed = _Broadcaster("master channel", _master_step, 3)
+# is_active and recency depend on the clock, so the dashboard is resent
+# every 10 s even when no transcript changes
+_dashboard_feed = _Broadcaster("dashboard", _dashboard_step, 10, refresh_interval=10)
+
+
+@app.websocket("/ws/master")
+async def ws_master(websocket: WebSocket):
+    """Live updates for master channel — re-reads active sessions when transcripts change."""
+    await _serve_feed(websocket, _master_feed)
+
+
+@app.websocket("/ws/dashboard")
+async def ws_dashboard(websocket: WebSocket):
+    """Live updates for the dashboard — resends the session list when transcripts change."""
+    await _serve_feed(websocket, _dashboard_feed)
+
+
+def _session_roots() -> list[Path]:
+    """Directories scan_sessions() looks in, for change notifications."""
+    if DATA_DIR is not None:
+        return [DATA_DIR]
+    return [src[0] for src in _DEFAULT_SOURCES]
+
+
+def _is_transcript(_change, path: str) -> bool:
+    """watchfiles filter: only session transcripts wake the WebSocket loops."""
+    return path.endswith((".jsonl", ".json"))
+
+
+async def _watch(
+    paths: list[Path],
+    poll_interval: float,
+    watch_filter=None,
+    recursive: bool = True,
+    idle_timeout: float = _WS_HEARTBEAT_INTERVAL,
+):
+    """Yield whenever something under *paths* changes.
+
+    Uses OS file notifications (watchfiles) so idle connections do no work,
+    and still yields every *idle_timeout* seconds so callers can send
+    heartbeats and refresh time-based state.  Without watchfiles, or
+    when nothing in *paths* exists yet, polls every *poll_interval* seconds.
+    """
+    paths = [p for p in paths if p.is_dir()]
+    if awatch is not None and paths:
+        try:
+            async for _ in awatch(
+                *paths,
+                watch_filter=watch_filter,
+                recursive=recursive,
+                rust_timeout=int(idle_timeout * 1000),
+                yield_on_timeout=True,
+            ):
+                yield
+        except OSError as exc:  # e.g. inotify watch limit reached
+            logger.warning("File watching unavailable (%s); polling instead", exc)
+    while True:
+        await asyncio.sleep(poll_interval)
+        yield
+
+
+def _file_hash(path: Path) -> tuple[int, int]:
+    """Quick signature of file size + integer mtime for change detection."""
     try:
         stat = path.stat()
-        return f"{stat.st_size}:{stat.st_mtime}"
+        return (stat.st_size, stat.st_mtime_ns)
     except OSError:
-        return ""
+        return (-1, -1)
 
 
 def _build_arg_parser() -> argparse.ArgumentParser:
@@ -848,4 +1211,9 @@ def main(args: list[str] | None = None) -> None:
         import threading
         threading.Timer(1.0, lambda: webbrowser.open(browser_url)).start()
 
-    uvicorn.run(app, host=host, port=port, log_level="warning")
+    # uvloop and httptools (shipped with uvicorn[standard]; uvloop is not
+    # available on Windows) lower per-request overhead for concurrent LLM
+    # calls, API requests and WebSocket feeds
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    uvicorn.run(app, host=host, port=port, loop=loop, http=http, log_level="warning")
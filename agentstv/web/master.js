@@ -151,9 +151,12 @@ function connectMasterWS() {
     ws.onmessage = (e) => {
         let msg;
         try { msg = JSON.parse(e.data); } catch { return; }
+        if (msg.type === 'delta' && state.session) {
+            // Deltas carry only the agents that changed since the last one
+            Object.assign(state.session.agents, msg.agents);
+        }
         if (msg.type === 'delta' && state.session && msg.events.length > 0) {
             state.session.events.push(...msg.events);
-            Object.assign(state.session.agents, msg.agents);
             if (state.session.events.length > 2000) {
                 state.session.events = state.session.events.slice(-2000);
             }
@@ -281,7 +281,8 @@ function connectSessionWS(filePath) {
             if (state.session.events.length > 2000) {
                 state.session.events = state.session.events.slice(-2000);
             }
-            state.session.agents = msg.agents;
+            // Deltas carry only the agents that changed since the last message
+            Object.assign(state.session.agents, msg.agents);
 
             if (msg.events.length > 0) {
                 const lastEvt = msg.events[msg.events.length - 1];
@@ -1,5 +1,7 @@
 """Tests for agentstv.llm — configuration, readiness, and response parsing."""
 
+import asyncio
+
 import pytest
 
 from agentstv import llm
@@ -22,6 +24,7 @@ def _save_restore_llm_state():
     yield
     for attr, val in saved.items():
         setattr(llm, attr, val)
+    llm.clear_cache()
 
 
 def test_configure_sets_provider():
@@ -95,3 +98,266 @@ async def test_shutdown_clients():
     assert llm._ollama_client is None or llm._ollama_client.is_closed
     assert llm._openai_client is None or llm._openai_client.is_closed
     assert llm._anthropic_client is None or llm._anthropic_client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_dispatch_caches_identical_prompts(monkeypatch):
+    """A repeated prompt is served from the response cache."""
+    calls = []
+
+    async def fake_provider(user_prompt, system_prompt="", *, count=5, raw=False):
+        calls.append(user_prompt)
+        return ["hello"]
+
+    monkeypatch.setattr(llm, "_call_provider", fake_provider)
+    configure(provider="ollama", ollama_model="test")
+    assert await llm._dispatch("prompt", "system", count=1) == ["hello"]
+    assert await llm._dispatch("prompt", "system", count=1) == ["hello"]
+    assert len(calls) == 1
+    # A different count is a different cache entry
+    await llm._dispatch("prompt", "system", count=2)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_dispatch_cache_expires(monkeypatch):
+    """Cached responses older than CACHE_TTL are refetched."""
+    calls = []
+
+    async def fake_provider(user_prompt, system_prompt="", *, count=5, raw=False):
+        calls.append(user_prompt)
+        return ["hello"]
+
+    monkeypatch.setattr(llm, "_call_provider", fake_provider)
+    monkeypatch.setattr(llm, "CACHE_TTL", 0.0)
+    configure(provider="ollama", ollama_model="test")
+    await llm._dispatch("prompt", "system", count=1)
+    await llm._dispatch("prompt", "system", count=1)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_dispatch_coalesces_concurrent_calls(monkeypatch):
+    """Concurrent identical prompts share a single provider call."""
+    calls = []
+    release = asyncio.Event()
+
+    async def fake_provider(user_prompt, system_prompt="", *, count=5, raw=False):
+        calls.append(user_prompt)
+        await release.wait()
+        return ["hello"]
+
+    monkeypatch.setattr(llm, "_call_provider", fake_provider)
+    configure(provider="ollama", ollama_model="test")
+    tasks = [asyncio.create_task(llm._dispatch("prompt", "system", count=1)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+    assert results == [["hello"]] * 3
+    assert len(calls) == 1
+
+
+def test_split_batch_groups_tagged_messages():
+    """Tagged batch output is grouped per job; untagged lines fill gaps."""
+    result = llm._split_batch(["[1] a", "[2] b", "[1] c", "loose"], [2, 2])
+    assert result == [["a", "c"], ["b", "loose"]]
+
+
+@pytest.mark.asyncio
+async def test_viewer_messages_are_batched(monkeypatch):
+    """Viewer-chat jobs queued together share one provider call."""
+    prompts = []
+
+    async def fake_dispatch(user_prompt, system_prompt="", *, count=5, raw=False):
+        prompts.append(user_prompt)
+        return ["[1] first", "[2] second"]
+
+    monkeypatch.setattr(llm, "_dispatch", fake_dispatch)
+    monkeypatch.setattr(llm, "_BATCH_WINDOW", 0.05)
+    configure(provider="ollama", ollama_model="test", low_power=False)
+    (msgs_a, _), (msgs_b, _) = await asyncio.gather(
+        llm.generate_viewer_messages("ctx a", count=1),
+        llm.generate_viewer_messages("ctx b", count=1),
+    )
+    assert len(prompts) == 1
+    assert msgs_a == ["first"]
+    assert msgs_b == ["second"]
+    await llm.shutdown_clients()
+
+
+@pytest.mark.asyncio
+async def test_repeated_viewer_messages_hit_cache(monkeypatch):
+    """The same context twice makes exactly one provider request."""
+    calls = []
+
+    async def fake_call(user_prompt, system_prompt="", *, count=5, raw=False):
+        calls.append(user_prompt)
+        return ["hello"]
+
+    monkeypatch.setattr(llm, "_call_provider", fake_call)
+    monkeypatch.setattr(llm, "_BATCH_WINDOW", 0.01)
+    configure(provider="ollama", ollama_model="test", low_power=False)
+    first, _ = await llm.generate_viewer_messages("same ctx", count=1)
+    second, _ = await llm.generate_viewer_messages("same ctx", count=1)
+    assert first == second == ["hello"]
+    assert len(calls) == 1
+    await llm.shutdown_clients()
+
+
+def test_array_scanner_handles_split_chunks():
+    """Strings are collected across chunk boundaries, including escapes."""
+    scanner = llm._ArrayStringScanner()
+    for chunk in ['{"messages": ["he', 'llo \\"x\\"", "', '", "wor', 'ld"]}']:
+        scanner.feed(chunk)
+    assert scanner.items == ['hello "x"', "world"]
+
+
+def test_compact_context_keeps_tail():
+    """Long context is trimmed to its most recent characters."""
+    context = "old line\n" * 50 + "newest  \n\n"
+    compact = llm._compact_context(context, max_chars=20)
+    assert compact.startswith("…\n")
+    assert compact.endswith("newest\n")
+    assert len(compact) <= 22
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_trips_after_repeated_failures(monkeypatch):
+    """Consecutive provider failures make is_ready() False until reconfigured."""
+    async def failing(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    configure(provider="ollama", ollama_model="test")
+    monkeypatch.setitem(llm._PROVIDERS, "ollama", failing)
+    for i in range(llm._CIRCUIT_THRESHOLD):
+        with pytest.raises(RuntimeError):
+            await llm._dispatch(f"prompt {i}", "system", count=1)
+    assert is_ready() is False
+    configure(ollama_model="test")
+    assert is_ready() is True
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_uses_resolved_provider(monkeypatch):
+    """Failures under an unrecognized provider setting open Ollama's breaker."""
+    async def failing(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    configure(provider="auto", ollama_model="test")
+    monkeypatch.setitem(llm._PROVIDERS, "ollama", failing)
+    for i in range(llm._CIRCUIT_THRESHOLD):
+        assert is_ready() is True
+        with pytest.raises(RuntimeError):
+            await llm._dispatch(f"prompt {i}", "system", count=1)
+    assert "auto" not in llm._circuit_open_until
+    assert is_ready() is False
+
+
+@pytest.mark.asyncio
+async def test_retry_post_backs_off_with_jitter(monkeypatch):
+    """Transient errors are retried with doubling, jittered, Retry-After-aware waits."""
+    import httpx
+
+    responses = iter([
+        httpx.ConnectError("refused"),
+        httpx.Response(503),
+        httpx.Response(429, headers={"retry-after": "2"}),
+        httpx.Response(200),
+    ])
+
+    def handler(request):
+        resp = next(responses)
+        if isinstance(resp, Exception):
+            raise resp
+        return resp
+
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(llm._rng, "random", lambda: 0.5)
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        resp = await llm._retry_post(client, "http://llm.test/", max_retries=4)
+    assert resp.status_code == 200
+    assert delays == [pytest.approx(0.3), pytest.approx(0.55), 2.0]
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_survives_memory_clear(monkeypatch, tmp_dir):
+    """With the disk cache on, replies are reused after the memory cache is dropped."""
+    calls = []
+
+    async def fake_provider(user_prompt, system_prompt="", *, count=5, raw=False):
+        calls.append(user_prompt)
+        return ["hello"]
+
+    monkeypatch.setattr(llm, "_call_provider", fake_provider)
+    monkeypatch.setattr(llm, "DISK_CACHE", True)
+    monkeypatch.setattr(llm, "CACHE_DIR", tmp_dir)
+    configure(provider="ollama", ollama_model="test")
+    try:
+        await llm._dispatch("prompt", "system", count=1)
+        llm.clear_cache()
+        assert await llm._dispatch("prompt", "system", count=1) == ["hello"]
+        assert len(calls) == 1
+    finally:
+        llm._close_disk_cache()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_survives_cancelled_owner(monkeypatch):
+    """Cancelling the caller that started a shared call doesn't fail the others."""
+    release = asyncio.Event()
+
+    async def fake_provider(user_prompt, system_prompt="", *, count=5, raw=False):
+        await release.wait()
+        return ["hello"]
+
+    monkeypatch.setattr(llm, "_call_provider", fake_provider)
+    configure(provider="ollama", ollama_model="test")
+    owner = asyncio.create_task(llm._dispatch("cancel me", "system", count=1))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(llm._dispatch("cancel me", "system", count=1))
+    await asyncio.sleep(0)
+    owner.cancel()
+    release.set()
+    assert await waiter == ["hello"]
+    assert owner.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_running_batches(monkeypatch):
+    """Batches in flight are tracked and cancelled by shutdown_clients()."""
+    started = asyncio.Event()
+
+    async def slow_dispatch(user_prompt, system_prompt="", *, count=5, raw=False):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(llm, "_dispatch", slow_dispatch)
+    monkeypatch.setattr(llm, "_BATCH_WINDOW", 0.01)
+    configure(provider="ollama", ollama_model="test", low_power=False)
+    job = asyncio.create_task(llm._enqueue_batched("ctx", 1))
+    await started.wait()
+    assert len(llm._batch_runs) == 1
+    await llm.shutdown_clients()
+    with pytest.raises(asyncio.CancelledError):
+        await job
+    await asyncio.sleep(0)
+    assert not llm._batch_runs
+
+
+def test_provider_semaphore_per_loop_and_bad_env(monkeypatch):
+    """A malformed limit falls back to the default; each loop gets its own semaphore."""
+    monkeypatch.setenv("AGENTSTV_OLLAMA_CONCURRENCY", "lots")
+
+    async def get():
+        return llm._provider_semaphore("ollama")
+
+    first = asyncio.run(get())
+    assert first._value == llm._DEFAULT_CONCURRENCY["ollama"]
+    assert asyncio.run(get()) is not first
@@ -84,3 +84,292 @@ def test_large_file_truncation(large_jsonl):
     # Just verify it completes and returns a session
     assert session is not None
     assert session.id is not None
+
+
+def test_event_dict_uses_wire_type_names(sample_claude_jsonl):
+    """Serialized events carry string type names, not enum ints."""
+    _parse_cache.clear()
+    session = parse(sample_claude_jsonl)
+    types = [e["type"] for e in session.to_dict()["events"]]
+    assert "user" in types
+    assert all(isinstance(t, str) for t in types)
+
+
+def test_parse_cache_is_lru(sample_claude_jsonl, sample_codex_jsonl, malformed_jsonl, monkeypatch):
+    """A cache hit refreshes an entry so the least recently used one is evicted."""
+    from agentstv import parser
+
+    _parse_cache.clear()
+    monkeypatch.setattr(parser, "_PARSE_CACHE_MAX", 2)
+    claude = parse(sample_claude_jsonl)
+    codex = parse(sample_codex_jsonl)
+    parse(sample_claude_jsonl)  # hit — claude becomes most recently used
+    parse(malformed_jsonl)  # evicts codex, not claude
+    assert parse(sample_claude_jsonl) is claude
+    assert parse(sample_codex_jsonl) is not codex
+
+
+def test_parse_cache_shares_hard_links(sample_claude_jsonl):
+    """Hard-linked transcripts resolve to the same cache entry."""
+    _parse_cache.clear()
+    link = sample_claude_jsonl.with_name("linked.jsonl")
+    os.link(sample_claude_jsonl, link)
+    assert parse(link) is parse(sample_claude_jsonl)
+
+
+def test_merge_streams_orders_events():
+    """Per-agent streams merge by timestamp, sorting any stream that is out of order."""
+    from agentstv.models import Event
+    from agentstv.parser import _merge_streams
+
+    def ev(ts, agent):
+        return Event(timestamp=ts, type=EventType.TEXT, agent_id=agent)
+
+    main = [ev("2025-01-01T00:00:01Z", "main"), ev("2025-01-01T00:00:04Z", "main")]
+    sub = [ev("2025-01-01T00:00:03Z", "sub"), ev("2025-01-01T00:00:02Z", "sub")]
+    merged = _merge_streams([main, sub])
+    assert [e.timestamp[-3:-1] for e in merged] == ["01", "02", "03", "04"]
+
+
+def test_parse_cache_remembers_format(sample_claude_jsonl, monkeypatch):
+    """A transcript that changes on disk is reparsed without re-sniffing its format."""
+    from agentstv import parser
+
+    _parse_cache.clear()
+    parse(sample_claude_jsonl)
+    stat = os.stat(sample_claude_jsonl)
+    os.utime(sample_claude_jsonl, (stat.st_mtime + 10, stat.st_mtime + 10))
+
+    def fail(_path):
+        raise AssertionError("format should come from the cache")
+
+    monkeypatch.setattr(parser, "_sniff_format", fail)
+    assert parse(sample_claude_jsonl).events
+
+
+def test_parse_decodes_transcript_once(sample_codex_jsonl, monkeypatch):
+    """Records decoded while sniffing the format are handed to the parser."""
+    from agentstv import parser
+
+    _parse_cache.clear()
+    calls = []
+    real = parser._read_jsonl_from
+    monkeypatch.setattr(parser, "_read_jsonl_from", lambda p, *a: calls.append(p) or real(p, *a))
+    assert parse(sample_codex_jsonl).events
+    assert len(calls) == 1
+
+
+def test_claude_tool_event_fields(sample_claude_jsonl):
+    """Tool events land their values in the right fields."""
+    _parse_cache.clear()
+    session = parse(sample_claude_jsonl)
+    ev = next(e for e in session.events if e.tool_name)
+    assert (ev.type, ev.agent_id, ev.tool_name, ev.file_path, ev.content) == (
+        EventType.BASH, "main", "Bash", "", "ls",
+    )
+
+
+def test_ts_to_ns():
+    """ISO timestamps become integer ns since the epoch, honoring offsets."""
+    from agentstv.parser import _ts_to_ns
+
+    assert _ts_to_ns("") == 0
+    assert _ts_to_ns("1970-01-01T00:00:01.5Z") == 1_500_000_000
+    assert _ts_to_ns("1970-01-01T01:00:00+01:00") == 0
+    assert _ts_to_ns("2024-01-01T00:00:01Z") > _ts_to_ns("2024-01-01T00:00:00.999999Z")
+    # Any number of fraction digits, as Codex/Claude write them
+    assert _ts_to_ns("1970-01-01T00:00:01.12345Z") == 1_123_450_000
+    assert _ts_to_ns("1970-01-01T00:00:01.123456789Z") == 1_123_456_000
+
+
+def test_sort_key_fills_ts_ns_for_every_event():
+    """An unparseable timestamp does not leave other events without ts_ns."""
+    from agentstv.models import Event, EventType
+    from agentstv.parser import _sort_key
+
+    events = [
+        Event("garbage", EventType.TEXT, "main"),
+        Event("1970-01-01T00:00:02.5Z", EventType.TEXT, "main"),
+    ]
+    key = _sort_key([events])
+    assert [key(e) for e in events] == [0, 2_500_000_000]
+
+
+def test_json_snippet_truncates():
+    """Tool args are serialized and cut to the display limit."""
+    from agentstv.parser import _json_snippet
+
+    assert _json_snippet({"command": "ls"}, 500).startswith('{"command":')
+    assert len(_json_snippet({"x": "y" * 1000}, 50)) == 50
+    assert _json_snippet({1: "non-str key"}, 500)
+
+
+def test_parse_claude_code_subagents(sample_claude_jsonl):
+    """Sub-agent transcripts are registered in file order and merged by time."""
+    import json
+
+    _parse_cache.clear()
+    sa_dir = sample_claude_jsonl.parent / "test-session-123" / "subagents"
+    sa_dir.mkdir(parents=True)
+    for n, ts in ((1, "2024-01-01T00:00:03Z"), (2, "2024-01-01T00:00:00.5Z")):
+        rec = {
+            "type": "user",
+            "agentId": f"sub{n}",
+            "sessionId": "test-session-123",
+            "timestamp": ts,
+            "message": {"content": f"task {n}"},
+        }
+        (sa_dir / f"agent-{n}.jsonl").write_text(json.dumps(rec) + "\n")
+
+    session = parse(sample_claude_jsonl)
+    assert list(session.agents) == ["main", "sub1", "sub2"]
+    assert session.agents["sub2"].spawn_time == "2024-01-01T00:00:00.5Z"
+    order = [e.ts_ns for e in session.events]
+    assert order == sorted(order)
+    assert {"sub1", "sub2"} <= {e.agent_id for e in session.events}
+
+
+def test_auto_detect_gemini_record_with_session_id(tmp_path):
+    """A sessionId alone does not make a non-Claude record Claude Code."""
+    import json
+
+    path = tmp_path / "gemini.jsonl"
+    rec = {"type": "gemini", "sessionId": "s", "content": "hello"}
+    path.write_text(json.dumps(rec) + "\n")
+    assert auto_detect(path) == "gemini"
+
+
+def test_auto_detect_reads_prefix_only(tmp_path):
+    """Detection looks at the head of the file but always sees a whole first record."""
+    import json
+
+    long_first = tmp_path / "long.jsonl"
+    rec = {"type": "user", "sessionId": "s", "message": {"content": "x" * 10_000}}
+    long_first.write_text(json.dumps(rec) + "\n")
+    assert auto_detect(long_first) == "claude_code"
+
+    late_marker = tmp_path / "late.jsonl"
+    filler = "".join(json.dumps({"n": i}) + "\n" for i in range(1000))
+    late_marker.write_text(filler + json.dumps({"type": "session_metadata"}) + "\n")
+    assert auto_detect(late_marker) == "codex"  # marker is past the sniffed prefix
+
+
+def test_parse_catches_up_on_appended_records(sample_claude_jsonl, monkeypatch):
+    """A grown transcript only has its new lines decoded, into a new session."""
+    import json
+
+    from agentstv import parser
+
+    _parse_cache.clear()
+    session = parse(sample_claude_jsonl)
+    before = len(session.events)
+
+    rec = {
+        "type": "user",
+        "sessionId": "test-session-123",
+        "timestamp": "2024-01-01T00:00:05Z",
+        "message": {"content": "and another thing"},
+    }
+    with open(sample_claude_jsonl, "a") as f:
+        f.write(json.dumps(rec) + "\n")
+        f.write('{"type": "user", "timest')  # record still being written
+
+    reads = []
+    real = parser._read_jsonl_from
+    monkeypatch.setattr(parser, "_read_jsonl_from", lambda p, *a: reads.append(a) or real(p, *a))
+    caught_up = parse(sample_claude_jsonl)
+    assert reads and reads[0][0] > 0  # resumed from an offset
+    assert len(caught_up.events) == before + 1
+    assert caught_up.events[-1].content == "and another thing"
+    assert len(session.events) == before  # sessions already handed out stay as they were
+
+    # Finishing the partial line picks it up on the next catch-up
+    with open(sample_claude_jsonl, "a") as f:
+        f.write('amp": "2024-01-01T00:00:06Z", "sessionId": "x", "message": {"content": "done"}}\n')
+    assert parse(sample_claude_jsonl).events[-1].content == "done"
+
+
+def test_catch_up_counts_request_tokens_once(tmp_path):
+    """Token bookkeeping carries over to records appended later."""
+    import json
+
+    _parse_cache.clear()
+    path = tmp_path / "tokens.jsonl"
+
+    def turn(ts, text):
+        return json.dumps({
+            "type": "assistant",
+            "sessionId": "s",
+            "requestId": "req-1",
+            "timestamp": ts,
+            "message": {
+                "content": [{"type": "tool_use", "name": "Bash", "input": {"command": text}}],
+                "usage": {"input_tokens": 100, "output_tokens": 10},
+            },
+        }) + "\n"
+
+    path.write_text(turn("2024-01-01T00:00:01Z", "ls"))
+    session = parse(path)
+    with open(path, "a") as f:
+        f.write(turn("2024-01-01T00:00:02Z", "pwd"))
+    session = parse(path)
+    assert session.agents["main"].input_tokens == 100
+    assert [e.input_tokens for e in session.events] == [100, 0]
+
+
+def test_parse_cache_hit_refreshes_ttl(sample_claude_jsonl, monkeypatch):
+    """A session that keeps being read stays cached past the TTL."""
+    from agentstv import parser
+
+    _parse_cache.clear()
+    clock = [1000.0]
+    monkeypatch.setattr(parser.time, "monotonic", lambda: clock[0])
+    first = parse(sample_claude_jsonl)
+    for _ in range(3):
+        clock[0] += parser._PARSE_CACHE_TTL - 1
+        assert parse(sample_claude_jsonl) is first
+
+
+def test_sniff_format_long_first_record(tmp_path):
+    """A first record longer than the sniff prefix is still read whole."""
+    import json
+
+    path = tmp_path / "long.jsonl"
+    rec = {"type": "session_meta", "payload": {"instructions": "x" * 100_000}}
+    path.write_text(json.dumps(rec) + "\n" + json.dumps({"type": "event_msg"}) + "\n")
+    assert auto_detect(path) == "codex"
+    path.write_text(json.dumps({"type": "file-history-snapshot", "blob": "y" * 100_000}) + "\n")
+    assert auto_detect(path) == "claude_code"
+
+
+def test_read_jsonl_truncation_logs_offset(tmp_path, caplog):
+    """Truncating at the line cap logs where reading stopped."""
+    import logging
+
+    from agentstv.parser import _read_jsonl_from
+
+    path = tmp_path / "many.jsonl"
+    path.write_text('{"n": 1}\n' * 5)
+    with caplog.at_level(logging.WARNING, logger="agentstv.parser"):
+        records, _, n_lines = _read_jsonl_from(path, max_lines=3)
+    assert n_lines == -1 and len(records) == 3
+    assert "at byte 27" in caplog.text
+
+
+def test_read_jsonl_counts_complete_lines(tmp_path, monkeypatch):
+    """Only newline-terminated lines count, across chunk boundaries."""
+    from agentstv import parser
+    from agentstv.parser import _read_jsonl_from
+
+    monkeypatch.setattr(parser, "_READ_CHUNK", 7)
+    path = tmp_path / "grow.jsonl"
+    path.write_text('{"n": 1}\n{"n": 2}\n{"n": 3}\n{"n": 4')
+    records, end, n_lines = _read_jsonl_from(path)
+    assert [r["n"] for r in records] == [1, 2, 3]
+    assert (end, n_lines) == (27, 3)
+    with path.open("a") as f:
+        f.write('}\n{"n": 5}\n')
+    records, end, n_lines = _read_jsonl_from(path, end)
+    assert [r["n"] for r in records] == [4, 5]
+    assert (end, n_lines) == (path.stat().st_size, 2)
+    assert _read_jsonl_from(path, 0, max_lines=4)[2] == -1
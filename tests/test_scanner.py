@@ -5,7 +5,7 @@ import shutil
 import time
 from pathlib import Path
 
-from agentstv.scanner import _scan_cache, scan_sessions
+from agentstv.scanner import _scan_cache, scan_sessions, session_index
 
 
 def test_scan_empty_dir(tmp_dir):
@@ -71,3 +71,19 @@ def test_active_detection(tmp_dir, sample_claude_jsonl):
     summaries = scan_sessions(tmp_dir)
     assert len(summaries) >= 1
     assert summaries[0].is_active is True
+
+
+def test_session_index_by_id_and_path(tmp_dir, sample_claude_jsonl):
+    """session_index resolves both session IDs and file paths from the scan."""
+    _scan_cache.clear()
+    project_dir = tmp_dir / "lookup-test"
+    project_dir.mkdir()
+    shutil.copy2(sample_claude_jsonl, project_dir / sample_claude_jsonl.name)
+
+    summaries = scan_sessions(tmp_dir)
+    s = summaries[0]
+    index = session_index(summaries)
+    assert index[s.id] is s
+    assert index[s.file_path] is s
+    assert "no-such-session" not in index
+    assert session_index(summaries) is index  # built once per scan result
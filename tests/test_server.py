@@ -3,9 +3,6 @@
 import pytest
 
 
-pytestmark = pytest.mark.asyncio
-
-
 @pytest.fixture(autouse=True)
 def _clear_rate_limits():
     """Clear the in-memory rate limiter between tests."""
@@ -15,6 +12,7 @@ def _clear_rate_limits():
     _rate_limits.clear()
 
 
+@pytest.mark.asyncio
 async def test_index_returns_html(app_client):
     """GET / returns 200 with HTML content."""
     resp = await app_client.get("/")
@@ -22,6 +20,7 @@ async def test_index_returns_html(app_client):
     assert "html" in resp.headers.get("content-type", "").lower()
 
 
+@pytest.mark.asyncio
 async def test_list_sessions(app_client):
     """GET /api/sessions returns 200 and a JSON list."""
     resp = await app_client.get("/api/sessions")
@@ -30,6 +29,7 @@ async def test_list_sessions(app_client):
     assert isinstance(data, list)
 
 
+@pytest.mark.asyncio
 async def test_get_settings(app_client):
     """GET /api/settings returns 200 and includes 'provider' key."""
     resp = await app_client.get("/api/settings")
@@ -38,6 +38,7 @@ async def test_get_settings(app_client):
     assert "provider" in data
 
 
+@pytest.mark.asyncio
 async def test_put_settings_invalid_url(app_client):
     """PUT /api/settings with an invalid URL returns 400."""
     resp = await app_client.put(
@@ -47,6 +48,7 @@ async def test_put_settings_invalid_url(app_client):
     assert resp.status_code == 400
 
 
+@pytest.mark.asyncio
 async def test_chat_empty_message(app_client):
     """POST /api/chat with an empty message returns an error response."""
     resp = await app_client.post("/api/chat", json={"message": ""})
@@ -54,6 +56,7 @@ async def test_chat_empty_message(app_client):
     assert "error" in data
 
 
+@pytest.mark.asyncio
 async def test_chat_too_long(app_client):
     """POST /api/chat with a message over 2000 chars returns 400."""
     long_msg = "x" * 3000
@@ -63,6 +66,7 @@ async def test_chat_too_long(app_client):
     assert "error" in data
 
 
+@pytest.mark.asyncio
 async def test_path_traversal_blocked(app_client):
     """GET /api/session/../../etc/passwd must not leak file contents."""
     resp = await app_client.get("/api/session/../../etc/passwd")
@@ -75,6 +79,7 @@ async def test_path_traversal_blocked(app_client):
         assert resp.status_code >= 400
 
 
+@pytest.mark.asyncio
 async def test_rate_limiting(app_client):
     """Hitting /api/chat 35 times rapidly should trigger 429 on later requests."""
     statuses = []
@@ -86,9 +91,367 @@ async def test_rate_limiting(app_client):
     assert 429 in statuses
 
 
+@pytest.mark.asyncio
 async def test_viewer_react_empty(app_client):
     """POST /api/viewer-react with an empty message returns empty reactions."""
     resp = await app_client.post("/api/viewer-react", json={"message": ""})
     assert resp.status_code == 200
     data = resp.json()
     assert data.get("reactions") == []
+
+
+@pytest.mark.asyncio
+async def test_watch_wakes_on_transcript_change(tmp_path):
+    """_watch yields promptly when a transcript under the watched dir changes."""
+    import asyncio
+    from agentstv.server import _is_transcript, _watch
+
+    changes = _watch([tmp_path], 60, watch_filter=_is_transcript)
+
+    async def touch():
+        await asyncio.sleep(0.2)
+        (tmp_path / "s.jsonl").write_text("{}\n")
+
+    writer = asyncio.create_task(touch())
+    try:
+        await asyncio.wait_for(anext(changes), timeout=10)
+    finally:
+        await changes.aclose()
+        await writer
+
+
+@pytest.mark.asyncio
+async def test_watch_polls_without_watchfiles(tmp_path, monkeypatch):
+    """Without watchfiles the loops fall back to polling."""
+    import asyncio
+    from agentstv import server
+
+    monkeypatch.setattr(server, "awatch", None)
+    changes = server._watch([tmp_path], 0.01)
+    try:
+        await asyncio.wait_for(anext(changes), timeout=1)
+    finally:
+        await changes.aclose()
+
+
+def test_redact_text():
+    """Secrets are masked and full paths reduced to their filename."""
+    from agentstv.server import _redact_text
+
+    out = _redact_text("export API_KEY=abc123 && cat /home/alice/project/notes.txt")
+    assert "abc123" not in out
+    assert "[REDACTED]" in out
+    assert "/home/alice" not in out
+    assert "…/notes.txt" in out
+    assert _redact_text("nothing to see here") == "nothing to see here"
+
+
+def test_redact_secret_keywords():
+    """Each secret keyword family is still caught by the factored pattern."""
+    from agentstv.server import _redact_text
+
+    for secret in (
+        "apikey: s3cr3t", "Access-Token=s3cr3t", "authorization: s3cr3t", "PASSWD=s3cr3t",
+        "client_secret=s3cr3t", "dsn=s3cr3t", "sk_live=s3cr3t", "ghp_abcdefghijkl1234",
+    ):
+        assert "s3cr3t" not in _redact_text(secret) and "abcdefghijkl" not in _redact_text(secret)
+
+
+@pytest.mark.asyncio
+async def test_send_json_uses_text_frames():
+    """WebSocket messages stay JSON text frames whichever encoder is used."""
+    import json
+
+    from agentstv.server import _send_json
+
+    class FakeSocket:
+        def __init__(self):
+            self.frames = []
+
+        async def send_text(self, text):
+            self.frames.append(json.loads(text))
+
+        async def send_json(self, payload):
+            self.frames.append(payload)
+
+    ws = FakeSocket()
+    await _send_json(ws, {"type": "ping", "n": [1, 2]})
+    assert ws.frames == [{"type": "ping", "n": [1, 2]}]
+
+
+@pytest.mark.asyncio
+async def test_scan_sessions_cached_single_flight(monkeypatch):
+    """Concurrent callers share one scan until the cache expires."""
+    import asyncio
+
+    from agentstv import server
+
+    calls = []
+
+    def fake_scan(base_dir):
+        calls.append(base_dir)
+        return []
+
+    monkeypatch.setattr(server, "scan_sessions", fake_scan)
+    monkeypatch.setattr(server, "_scan_result", (0.0, []))
+    results = await asyncio.gather(*(server._scan_sessions_cached() for _ in range(5)))
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+
+@pytest.mark.asyncio
+async def test_broadcaster_fans_out_one_poller(monkeypatch):
+    """Subscribers share one step; late joiners start from the snapshot."""
+    import asyncio
+
+    from agentstv import server
+
+    steps = []
+
+    async def step(state):
+        steps.append(1)
+        n = len(steps)
+        return {"snapshot": n}, {"update": n}
+
+    monkeypatch.setattr(server, "_session_roots", lambda: [])
+    feed = server._Broadcaster("test", step, 60)
+    first, second = feed.subscribe(), feed.subscribe()
+    assert await first.get() == {"update": 1}
+    assert await second.get() == {"update": 1}
+    late = feed.subscribe()
+    assert late.get_nowait() == {"snapshot": 1}
+    assert len(steps) == 1
+
+    task = feed._task
+    for q in (first, second, late):
+        feed.unsubscribe(q)
+    await asyncio.sleep(0)
+    assert task.cancelled() or task.done()
+
+
+@pytest.mark.asyncio
+async def test_broadcaster_drops_slow_subscriber(monkeypatch):
+    """A subscriber whose queue fills up is dropped instead of growing it."""
+    import asyncio
+
+    from agentstv import server
+
+    n = 0
+
+    async def step(state):
+        nonlocal n
+        n += 1
+        return None, {"update": n}
+
+    monkeypatch.setattr(server, "_session_roots", lambda: [])
+    monkeypatch.setattr(server, "_FEED_QUEUE_SIZE", 3)
+    feed = server._Broadcaster("test", step, 0.001)
+    slow, fast = feed.subscribe(), feed.subscribe()
+    received = []
+    while len(received) < 5:
+        received.append(await fast.get())
+    assert slow not in feed._subscribers and fast in feed._subscribers
+    assert slow.get_nowait() is None and slow.empty()
+    assert received == [{"update": i} for i in range(1, 6)]
+    for q in (slow, fast):
+        feed.unsubscribe(q)
+
+
+def test_redact_summary_hashes_path_once(monkeypatch):
+    """Public-mode summaries get a stable 12-char path hash that maps back."""
+    from agentstv import server
+
+    monkeypatch.setattr(server, "PUBLIC_MODE", True)
+    first = server._redact_summary({"file_path": "/home/u/.claude/projects/p/s.jsonl"})
+    second = server._redact_summary({"file_path": "/home/u/.claude/projects/p/s.jsonl"})
+    assert first["file_path"] == second["file_path"]
+    assert len(first["file_path"]) == 12
+    assert server._path_map[first["file_path"]] == "/home/u/.claude/projects/p/s.jsonl"
+
+
+def test_event_dict_caches_redaction(monkeypatch):
+    """Public-mode event dicts are redacted once and cached on the event."""
+    from agentstv import server
+    from agentstv.models import Event, EventType
+
+    monkeypatch.setattr(server, "PUBLIC_MODE", True)
+    evt = Event("2025-01-01T00:00:00Z", EventType.TEXT, "main", content="password=s3cr3t")
+    first = server._event_dict(evt)
+    first["project"] = "p"
+    assert "s3cr3t" not in first["content"]
+    assert evt.public_dict is not None and "project" not in evt.public_dict
+    assert server._event_dict(evt) == evt.public_dict
+
+
+def test_redact_high_entropy_tokens_only():
+    """Random-looking long tokens are redacted; identifiers and paths are kept."""
+    from agentstv.server import _redact_text
+
+    key = "q8Zr2LxV+7mNf3Kd0WbYp9Tj/Hs4Gc6RaE1uQoIvXz5S"
+    assert key not in _redact_text(f"use {key} here")
+    for kept in ("some_long_identifier_name_here", "getElementsByClassName", "node_modules/react-dom/cjs"):
+        assert _redact_text(f"call {kept}()") == f"call {kept}()"
+
+
+def test_redact_keeps_urls_and_identifiers():
+    """URLs, snake_case names, branch names and env vars are not taken for keys."""
+    from agentstv.server import _redact_text
+
+    for kept in (
+        "https://github.com/andrewle8/AgentsTV/pull/123/files",
+        "https://example.com/api/v1/users/12345/profile",
+        "ENV_VAR_NAME_WITH_NUMBERS_123_456",
+        "handle_v2_upgrade_path_fix",
+        "feature/JIRA-1234-add-user-auth",
+        '"react-dom/client-v18"',
+        "useCallbackMemoizedHandler42",
+        "sha256WithRSAEncryption2048",
+    ):
+        assert _redact_text(kept) == kept, kept
+
+
+def test_redact_hex_and_short_tokens():
+    """Hex keys and 20-22 char tokens are caught despite their lower entropy ceiling."""
+    from agentstv.server import _redact_text
+
+    for token in (
+        "fd39a3810cb2a41e92b0d3d4eb4d5f3d32f410fd0fe0228f13a69019aa71870b",  # token_hex(32), 3.81 bits
+        "da39a3ee5e6b4b0d3255bfef95601890",  # 32 hex chars
+        "1FGfJ4frxJOJ1_AbVgGm5w",  # 22 base64url chars, 3.97 bits
+    ):
+        assert token not in _redact_text(f"x {token} y"), token
+
+
+@pytest.mark.asyncio
+async def test_master_merges_sessions_in_time_order(app_client, tmp_dir, monkeypatch):
+    """/api/master interleaves events from several projects by timestamp."""
+    import json
+
+    from agentstv import server
+    from agentstv.scanner import _scan_cache
+
+    for proj, seconds in (("alpha", (0, 2)), ("beta", (1, 3))):
+        d = tmp_dir / proj
+        d.mkdir()
+        with open(d / f"{proj}-session.jsonl", "w", encoding="utf-8") as f:
+            for sec in seconds:
+                f.write(json.dumps({
+                    "type": "user",
+                    "sessionId": f"{proj}-session",
+                    "timestamp": f"2024-01-01T00:00:0{sec}Z",
+                    "message": {"content": f"{proj} {sec}"},
+                }) + "\n")
+
+    _scan_cache.clear()
+    monkeypatch.setattr(server, "DATA_DIR", tmp_dir)
+    monkeypatch.setattr(server, "_scan_result", (0.0, []))
+    resp = await app_client.get("/api/master")
+    events = resp.json()["events"]
+    assert [e["timestamp"][-3:-1] for e in events] == ["00", "01", "02", "03"]
+    assert {e["project"] for e in events} == {"alpha", "beta"}
+
+
+@pytest.mark.asyncio
+async def test_master_keeps_latest_events(app_client, tmp_dir, monkeypatch):
+    """/api/master returns only the newest _MASTER_EVENT_LIMIT events."""
+    import json
+
+    from agentstv import server
+    from agentstv.parser import _parse_cache
+    from agentstv.scanner import _scan_cache
+
+    d = tmp_dir / "proj"
+    d.mkdir()
+    with open(d / "s.jsonl", "w", encoding="utf-8") as f:
+        for sec in range(5):
+            f.write(json.dumps({
+                "type": "user",
+                "sessionId": "s",
+                "timestamp": f"2024-01-01T00:00:0{sec}Z",
+                "message": {"content": str(sec)},
+            }) + "\n")
+
+    _scan_cache.clear()
+    _parse_cache.clear()
+    monkeypatch.setattr(server, "DATA_DIR", tmp_dir)
+    monkeypatch.setattr(server, "_scan_result", (0.0, []))
+    monkeypatch.setattr(server, "_MASTER_EVENT_LIMIT", 3)
+    events = (await app_client.get("/api/master")).json()["events"]
+    assert [e["content"] for e in events] == ["2", "3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_parse_all_returns_failures(tmp_dir, sample_claude_jsonl):
+    """_parse_all parses concurrently and hands back errors in place."""
+    from agentstv.models import Session
+    from agentstv.server import _parse_all
+
+    missing = str(tmp_dir / "missing.jsonl")
+    ok, failed = await _parse_all([str(sample_claude_jsonl), missing])
+    assert isinstance(ok, Session) and ok.events
+    assert isinstance(failed, OSError)
+
+
+def test_redact_paths_keep_filename():
+    """Unix and Windows paths are both cut down to their last component."""
+    from agentstv.server import _redact_text
+
+    out = _redact_text("open /home/alice/proj/main.py, C:\\Users\\bob\\app\\cfg.toml and /tmp/build/")
+    assert out == "open …/main.py …/cfg.toml and …/build"
+
+
+@pytest.mark.asyncio
+async def test_master_step_sends_only_changed_agents(tmp_dir, sample_claude_jsonl, monkeypatch):
+    """A tick with no new events and unchanged agents broadcasts nothing."""
+    import shutil
+
+    from agentstv import server
+    from agentstv.parser import _parse_cache
+    from agentstv.scanner import _scan_cache
+
+    d = tmp_dir / "proj"
+    d.mkdir()
+    shutil.copy2(sample_claude_jsonl, d / sample_claude_jsonl.name)
+    (d / sample_claude_jsonl.name).touch()
+
+    _scan_cache.clear()
+    _parse_cache.clear()
+    monkeypatch.setattr(server, "DATA_DIR", tmp_dir)
+    monkeypatch.setattr(server, "_scan_result", (0.0, []))
+    state = {}
+    _, first = await server._master_step(state)
+    assert first["events"] and first["agents"]
+    snapshot, second = await server._master_step(state)
+    assert second is None
+    assert snapshot["agents"] == first["agents"]
+
+
+@pytest.mark.asyncio
+async def test_viewer_chat_master_uses_merged_context(app_client, tmp_dir, sample_claude_jsonl, monkeypatch):
+    """Viewer chat on __master__ builds its LLM context from the merged feed."""
+    import shutil
+
+    from agentstv import llm, server
+    from agentstv.parser import _parse_cache
+    from agentstv.scanner import _scan_cache
+
+    d = tmp_dir / "proj"
+    d.mkdir()
+    shutil.copy2(sample_claude_jsonl, d / sample_claude_jsonl.name)
+    _scan_cache.clear()
+    _parse_cache.clear()
+    server._chat_buffers.clear()
+    monkeypatch.setattr(server, "DATA_DIR", tmp_dir)
+    monkeypatch.setattr(server, "_scan_result", (0.0, []))
+
+    contexts = []
+
+    async def fake_generate(context, count=10):
+        contexts.append(context)
+        return ["nice"], ""
+
+    monkeypatch.setattr(llm, "generate_viewer_messages", fake_generate)
+    resp = await app_client.get("/api/viewer-chat/__master__")
+    assert resp.json()["message"] == "nice"
+    assert contexts and "Hello" in contexts[0]
+    server._chat_buffers.clear()